@@ -1,13 +1,34 @@
+import importlib
+
+import click
 import typer
-import yaml
-from dedupe_gemini.seeder import seed_command
+from typer.core import TyperGroup
 from dedupe_gemini.config import load_config
-from dedupe_gemini.eda import app as eda_app
-from dedupe_gemini.etl import app as etl_app
-from dedupe_gemini.deduplication import app as dedupe_app
-from dedupe_gemini.check import app as check_app
 
-app = typer.Typer()
+# Sub-apps are imported only when their command is used, so commands like
+# `hello` or `config` don't pay for loading splink, duckdb and pandas.
+LAZY_SUBAPPS = {
+    "eda": "dedupe_gemini.eda",
+    "etl": "dedupe_gemini.etl",
+    "deduplicate": "dedupe_gemini.deduplication",
+    "check": "dedupe_gemini.check",
+}
+
+
+class LazyGroup(TyperGroup):
+    def list_commands(self, ctx: click.Context):
+        return super().list_commands(ctx) + list(LAZY_SUBAPPS)
+
+    def get_command(self, ctx: click.Context, cmd_name: str):
+        if cmd_name in LAZY_SUBAPPS:
+            module = importlib.import_module(LAZY_SUBAPPS[cmd_name])
+            group = typer.main.get_group(module.app)
+            group.name = cmd_name
+            return group
+        return super().get_command(ctx, cmd_name)
+
+
+app = typer.Typer(cls=LazyGroup)
 
 
 @app.command()
@@ -34,10 +55,13 @@ def seed(
     count: int = typer.Option(1000, help="Number of records to seed"),
     duplicates: float = typer.Option(None, help="Percentage of duplicates (0.0 to 1.0)"),
     batch_size: int = typer.Option(None, help="Batch size for insertion"),
+    workers: int = typer.Option(None, help="Record generator processes (default: one per CPU)"),
 ):
     """
     Seed the database with synthetic data.
     """
+    from dedupe_gemini.seeder import seed_command
+
     # Load defaults from config
     config = load_config()
     
@@ -48,7 +72,7 @@ def seed(
     if batch_size is None:
         batch_size = config.get("seeding", {}).get("default_batch_size", 1000)
     
-    seed_command(count=count, duplicates=duplicates, batch_size=batch_size)
+    seed_command(count=count, duplicates=duplicates, batch_size=batch_size, workers=workers)
 
 
 @app.command()
@@ -56,13 +80,15 @@ def config():
     """
     Display the current configuration.
     """
-    cfg = load_config()
-    print(yaml.dump(cfg, default_flow_style=False))
+    import yaml
 
-app.add_typer(eda_app, name="eda")
-app.add_typer(etl_app, name="etl")
-app.add_typer(dedupe_app, name="deduplicate")
-app.add_typer(check_app, name="check")
+    try:
+        from yaml import CSafeDumper as Dumper
+    except ImportError:
+        from yaml import SafeDumper as Dumper
+
+    cfg = load_config()
+    print(yaml.dump(cfg, Dumper=Dumper, default_flow_style=False))
 
 if __name__ == "__main__":
     app()
@@ -1,7 +1,14 @@
+import copy
 import yaml
 import os
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+
+# Prefer the libyaml-backed loader when PyYAML was built with it.
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
 
 DEFAULT_CONFIG = {
     "database": {
@@ -17,6 +24,24 @@ DEFAULT_CONFIG = {
     }
 }
 
+# Parsed configs keyed by (resolved path, mtime_ns) so repeated calls in one
+# process skip the disk read and YAML parse.
+_CACHE: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
+
+def _deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Recursively merge `override` into `base`, returning a new dict.
+    """
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merged[key] = _deep_merge(base[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
 def load_config(config_path: str = "config.yml") -> Dict[str, Any]:
     """
     Load configuration from a YAML file. If not found, returns default config.
@@ -27,23 +52,22 @@ def load_config(config_path: str = "config.yml") -> Dict[str, Any]:
         path = Path.cwd() / config_path
         
     if path.exists():
+        path = path.resolve()
+        cache_key = (str(path), path.stat().st_mtime_ns)
+        if cache_key in _CACHE:
+            return copy.deepcopy(_CACHE[cache_key])
+
         with open(path, "r") as f:
             try:
-                user_config = yaml.safe_load(f)
-                # Simple merge: user config overrides defaults
-                # A deep merge would be better for nested dicts, but this suffices for now
-                config = DEFAULT_CONFIG.copy()
-                config.update(user_config)
-                
-                # Ensure nested keys are preserved if only partial config provided
-                if "database" in user_config:
-                    config["database"] = {**DEFAULT_CONFIG["database"], **user_config["database"]}
-                if "seeding" in user_config:
-                    config["seeding"] = {**DEFAULT_CONFIG["seeding"], **user_config["seeding"]}
-                    
-                return config
+                # An empty file parses to None
+                user_config = yaml.load(f, Loader=_Loader) or {}
+                # User config overrides defaults, nested sections included
+                config = _deep_merge(DEFAULT_CONFIG, user_config)
             except yaml.YAMLError as exc:
                 print(f"Error parsing config file: {exc}")
-                return DEFAULT_CONFIG
+                return copy.deepcopy(DEFAULT_CONFIG)
+
+        _CACHE[cache_key] = config
+        return copy.deepcopy(config)
     
-    return DEFAULT_CONFIG
+    return copy.deepcopy(DEFAULT_CONFIG)
@@ -1,14 +1,119 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 import os
 from dedupe_gemini.config import load_config
 
 _engine = None
 
+# Recycle pooled connections before MySQL's wait_timeout drops them.
+POOL_RECYCLE_SECONDS = 3600
+
 def get_engine():
     global _engine
     if _engine is None:
         config = load_config()
+        db_config = config.get("database", {})
         # Allow env variable to override config
-        db_url = os.getenv("DATABASE_URL", config.get("database", {}).get("url"))
-        _engine = create_engine(db_url)
+        db_url = make_url(os.getenv("DATABASE_URL", db_config.get("url")))
+
+        connect_args = {}
+        if db_url.get_backend_name() == "mysql" and "charset" not in db_url.query:
+            # Fix the charset up front instead of negotiating it per connection
+            connect_args["charset"] = "utf8mb4"
+
+        pool_args = {}
+        if db_url.get_backend_name() in ("mysql", "mariadb"):
+            # QueuePool sizing; other pool classes (e.g. SQLite's) reject these
+            pool_args["pool_size"] = db_config.get("pool_size", 5)
+            pool_args["max_overflow"] = db_config.get("max_overflow", 10)
+
+        _engine = create_engine(
+            db_url,
+            pool_pre_ping=True,
+            pool_recycle=POOL_RECYCLE_SECONDS,
+            connect_args=connect_args,
+            **pool_args,
+        )
     return _engine
+
+def duckdb_config():
+    """
+    Connection settings for the local DuckDB file, from the optional `duckdb`
+    config section. Threads default to every core; memory_limit is only set
+    when configured, otherwise DuckDB's own (cgroup-aware) default applies.
+    """
+    settings = load_config().get("duckdb") or {}
+    config = {
+        "threads": int(settings.get("threads") or os.cpu_count() or 1),
+        "enable_object_cache": True,
+    }
+    if settings.get("memory_limit"):
+        config["memory_limit"] = str(settings["memory_limit"])
+    return config
+
+def ensure_unprocessed_queue(conn):
+    """
+    Create the `unprocessed_ids` queue of staging rows awaiting deduplication.
+    When the queue is first created it is backfilled from rows that were
+    extracted before it existed.
+    """
+    exists = conn.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = 'unprocessed_ids'"
+    ).fetchone()[0]
+    if exists:
+        return
+
+    conn.execute("""
+        CREATE TABLE unprocessed_ids (
+            NOMOR_INDUK VARCHAR PRIMARY KEY
+        )
+    """)
+    conn.execute("""
+        INSERT INTO unprocessed_ids
+        SELECT NOMOR_INDUK FROM staging_identitas WHERE PROCESSED_AT IS NULL
+    """)
+
+# Column sets used as blocking keys, for both prediction and EM training.
+BLOCKING_KEYS = [
+    ("NIK",),
+    ("CLEAN_NAMA", "TANGGAL_LAHIR"),
+    ("CLEAN_NM_IBU", "TANGGAL_LAHIR"),
+    ("CLEAN_NAMA", "ID_JENIS_KELAMIN", "CLEAN_NM_IBU"),
+]
+
+def blocking_key_column(cols) -> str:
+    """
+    Name of the `staging_identitas` column holding the hashed blocking key for `cols`.
+    """
+    return "KEY_" + "_".join(cols)
+
+def blocking_key_sql(cols) -> str:
+    """
+    DuckDB expression for a 64-bit blocking key over `cols`: NULL when any of
+    them is NULL, like equality on the columns themselves. MD5 rather than
+    hash() so persisted keys stay comparable across DuckDB versions.
+    """
+    not_null = " AND ".join(f"{c} IS NOT NULL" for c in cols)
+    return f"CASE WHEN {not_null} THEN md5_number_upper(concat_ws(chr(31), {', '.join(cols)})) END"
+
+def ensure_blocking_keys(conn):
+    """
+    Add the hashed blocking-key columns to `staging_identitas`, backfilling
+    them for rows that were extracted before they existed.
+    """
+    existing = {
+        row[0]
+        for row in conn.execute(
+            "SELECT column_name FROM duckdb_columns() WHERE table_name = 'staging_identitas'"
+        ).fetchall()
+    }
+    missing = [cols for cols in BLOCKING_KEYS if blocking_key_column(cols) not in existing]
+    if not missing:
+        return
+
+    for cols in missing:
+        conn.execute(f"ALTER TABLE staging_identitas ADD COLUMN {blocking_key_column(cols)} UBIGINT")
+    assignments = ", ".join(
+        f"{blocking_key_column(cols)} = {blocking_key_sql(cols)}" for cols in missing
+    )
+    conn.execute(f"UPDATE staging_identitas SET {assignments}")
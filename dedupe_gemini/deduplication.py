@@ -5,10 +5,25 @@ import os
 from typing import Optional
 
 import duckdb
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import typer
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
 from splink import DuckDBAPI, Linker, block_on
+from splink.blocking_rule_library import CustomRule
+from splink.internals.constants import LEVEL_NOT_OBSERVED_TEXT
 import splink.comparison_library as cl
+import splink.comparison_level_library as cll
+
+from dedupe_gemini.db import (
+    BLOCKING_KEYS,
+    blocking_key_column,
+    duckdb_config,
+    ensure_blocking_keys,
+    ensure_unprocessed_queue,
+)
 
 app = typer.Typer()
 
@@ -23,6 +38,31 @@ logger = logging.getLogger(__name__)
 DUCKDB_PATH = "data/processed.duckdb"
 MODEL_PATH = "data/splink_model.json"
 
+# Below this many edges a pure-Python union-find beats building a sparse matrix.
+SPARSE_CC_MIN_EDGES = 1000
+
+# Label-propagation rounds attempted in DuckDB before falling back to Python.
+MAX_LABEL_ROUNDS = 30
+
+INT64_MAX = 9_223_372_036_854_775_807
+
+# Columns with term-frequency adjustments in the model.
+TF_COLUMNS = ["CLEAN_NAMA", "CLEAN_NM_AYAH", "CLEAN_NM_IBU"]
+
+# Persisted TF tables are rebuilt once staging grows by more than this fraction.
+TF_REFRESH_GROWTH = 0.05
+
+# u-estimation stops sampling chunks once every comparison level has been
+# observed about this many times.
+U_MIN_COUNT_PER_LEVEL = 100
+
+# A u-estimation chunk that samples fewer pairs than this share of its target
+# is treated as an error rather than averaged in.
+U_MIN_CHUNK_PAIRS_FRACTION = 0.5
+
+# Splink tables built by find_matches_to_new_records, in execution order.
+MATCH_SQL_STEPS = ("__splink__blocked_id_pairs", "__splink__find_matches_predictions")
+
 
 class UnionFind:
     def __init__(self):
@@ -35,10 +75,19 @@ class UnionFind:
             self.rank[x] = 0
 
     def find(self, x: str) -> str:
-        self.add(x)
-        if self.parent[x] != x:
-            self.parent[x] = self.find(self.parent[x])
-        return self.parent[x]
+        parent = self.parent
+        if x not in parent:
+            parent[x] = x
+            self.rank[x] = 0
+            return x
+
+        # Walk to the root, then compress the path without recursion.
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
 
     def union(self, a: str, b: str):
         ra = self.find(a)
@@ -57,7 +106,7 @@ class UnionFind:
 
 def get_duckdb_conn():
     os.makedirs("data", exist_ok=True)
-    conn = duckdb.connect(DUCKDB_PATH)
+    conn = duckdb.connect(DUCKDB_PATH, config=duckdb_config())
     # Ensure processed table exists
     conn.execute(
         """
@@ -72,28 +121,129 @@ def get_duckdb_conn():
     return conn
 
 
+def _register_arrow(conn: duckdb.DuckDBPyConnection, name: str, df: pd.DataFrame):
+    """
+    Register a DataFrame with DuckDB as an Arrow table, converting it once
+    instead of having DuckDB inspect pandas dtypes on every scan.
+    """
+    conn.register(name, pa.Table.from_pandas(df, preserve_index=False))
+
+
+def _salting_partitions() -> Optional[int]:
+    """
+    Salt blocking joins across CPU cores so DuckDB can parallelise them.
+    """
+    n_cores = os.cpu_count() or 1
+    return n_cores if n_cores > 1 else None
+
+
 def get_blocking_rules():
     """
     Blocking rules tuned for higher cardinality (safer for larger datasets).
+    Each joins on the persisted 64-bit key column instead of the raw columns.
     """
+    salt = _salting_partitions()
     return [
-        block_on("NIK"),
-        block_on("CLEAN_NAMA", "TANGGAL_LAHIR"),
-        block_on("CLEAN_NM_IBU", "TANGGAL_LAHIR"),
-        block_on("CLEAN_NAMA", "ID_JENIS_KELAMIN", "CLEAN_NM_IBU"),
+        block_on(blocking_key_column(cols), salting_partitions=salt)
+        for cols in BLOCKING_KEYS
     ]
 
 
 def get_em_training_rules():
     """
     Diverse rules used during EM so more parameters are estimable.
+    These block on the raw columns: Splink reads them from the rule to fix
+    the comparisons they determine.
     """
-    return [
-        block_on("NIK"),
-        block_on("CLEAN_NAMA", "TANGGAL_LAHIR"),
-        block_on("CLEAN_NM_IBU", "TANGGAL_LAHIR"),
-        block_on("CLEAN_NAMA", "ID_JENIS_KELAMIN", "CLEAN_NM_IBU"),
-    ]
+    salt = _salting_partitions()
+    return [block_on(*cols, salting_partitions=salt) for cols in BLOCKING_KEYS]
+
+
+def get_capped_blocking_rules(
+    conn: duckdb.DuckDBPyConnection,
+    max_block_size: int,
+    source_table: str = "staging_identitas",
+    salted: bool = True,
+    on_key_columns: bool = True,
+):
+    """
+    Blocking rules (one per BLOCKING_KEYS entry) that skip keys shared by more
+    than `max_block_size` records of `source_table`, so one skewed value cannot
+    produce a quadratic block. Pass salted=False where Splink does not support
+    salting (deterministic rules for the prior), and on_key_columns=False to
+    join on the raw columns (EM training, see `get_em_training_rules`).
+    """
+    salt = _salting_partitions() if salted else None
+    rules = []
+    for i, cols in enumerate(BLOCKING_KEYS):
+        table = f"oversized_blocks_{i}"
+        key = blocking_key_column(cols)
+        conn.sql(
+            f"""
+            CREATE OR REPLACE TEMP TABLE {table} AS
+            SELECT {key} AS block_key
+            FROM {source_table}
+            WHERE {key} IS NOT NULL
+            GROUP BY block_key
+            HAVING COUNT(*) > {int(max_block_size)}
+        """
+        )
+        n_oversized = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if n_oversized:
+            logger.warning(
+                f"Blocking on {', '.join(cols)}: skipping {n_oversized:,} key(s) "
+                f"with more than {max_block_size:,} records."
+            )
+
+        if on_key_columns:
+            equality = f"l.{key} = r.{key}"
+        else:
+            equality = " AND ".join(f"l.{c} = r.{c}" for c in cols)
+        rules.append(
+            CustomRule(
+                f"{equality} AND l.{key} NOT IN (SELECT block_key FROM {table})",
+                salting_partitions=salt,
+            )
+        )
+    return rules
+
+
+class JaroWinklerCutoffLevel(cll.JaroWinklerLevel):
+    """
+    Jaro-Winkler level passing DuckDB a score_cutoff, so dissimilar pairs
+    bail out early with 0 instead of computing an exact score.
+    """
+
+    def __init__(self, col_name, distance_threshold: float, score_cutoff: float):
+        super().__init__(col_name, distance_threshold)
+        self.score_cutoff = score_cutoff
+
+    def create_sql(self, sql_dialect) -> str:
+        self.col_expression.sql_dialect = sql_dialect
+        col = self.col_expression
+        return (
+            f"jaro_winkler_similarity({col.name_l}, {col.name_r}, {self.score_cutoff})"
+            f" >= {self.distance_threshold}"
+        )
+
+
+class JaroWinklerAtThresholds(cl.JaroWinklerAtThresholds):
+    """
+    cl.JaroWinklerAtThresholds with every level cut off at the lowest
+    threshold. Scores below it fall through to the else level either way.
+    """
+
+    def create_comparison_levels(self):
+        score_cutoff = min(self.thresholds)
+        return [
+            cll.NullLevel(self.col_expression),
+            cll.ExactMatchLevel(self.col_expression),
+            *[
+                JaroWinklerCutoffLevel(self.col_expression, threshold, score_cutoff)
+                for threshold in self.thresholds
+            ],
+            cll.ElseLevel(),
+        ]
 
 
 def get_settings(retain_debug_columns: bool = False):
@@ -113,14 +263,14 @@ def get_settings(retain_debug_columns: bool = False):
                 datetime_metrics=["month", "year"],
             ),
             cl.ExactMatch("ID_JENIS_KELAMIN"),
-            cl.JaroWinklerAtThresholds("CLEAN_NAMA", [0.97, 0.93, 0.88]).configure(
+            JaroWinklerAtThresholds("CLEAN_NAMA", [0.97, 0.93, 0.88]).configure(
                 term_frequency_adjustments=True
             ),
-            cl.JaroWinklerAtThresholds("CLEAN_ALAMAT", [0.95, 0.90, 0.85]),
-            cl.JaroWinklerAtThresholds("CLEAN_NM_AYAH", [0.97, 0.93, 0.88]).configure(
+            JaroWinklerAtThresholds("CLEAN_ALAMAT", [0.95, 0.90, 0.85]),
+            JaroWinklerAtThresholds("CLEAN_NM_AYAH", [0.97, 0.93, 0.88]).configure(
                 term_frequency_adjustments=True
             ),
-            cl.JaroWinklerAtThresholds("CLEAN_NM_IBU", [0.97, 0.93, 0.88]).configure(
+            JaroWinklerAtThresholds("CLEAN_NM_IBU", [0.97, 0.93, 0.88]).configure(
                 term_frequency_adjustments=True
             ),
         ],
@@ -134,129 +284,482 @@ def _compute_tf_tables(linker: Linker):
     """
     Precompute TF tables for columns with TF adjustments.
     """
-    for col in ["CLEAN_NAMA", "CLEAN_NM_AYAH", "CLEAN_NM_IBU"]:
+    tf_tables = {}
+    for col in TF_COLUMNS:
         try:
-            linker.table_management.compute_tf_table(col)
+            tf_tables[col] = linker.table_management.compute_tf_table(col)
         except Exception as e:
             logger.warning(f"Could not compute TF table for {col}: {e}")
+    return tf_tables
+
+
+def _load_or_compute_tf_tables(
+    conn: duckdb.DuckDBPyConnection, linker: Linker, refresh: bool = False
+):
+    """
+    Register persisted TF tables (tf_<column>) with the linker, recomputing and
+    persisting them when missing, when forced, or once staging has grown by
+    more than TF_REFRESH_GROWTH since they were built.
+    """
+    staging_rows = conn.execute("SELECT COUNT(*) FROM staging_identitas").fetchone()[0]
+    conn.sql(
+        """
+        CREATE TABLE IF NOT EXISTS tf_tables_meta (
+            STAGING_ROWS BIGINT,
+            COMPUTED_AT TIMESTAMP DEFAULT NOW()
+        )
+    """
+    )
+    meta = conn.execute("SELECT STAGING_ROWS FROM tf_tables_meta").fetchone()
+    existing = {
+        row[0] for row in conn.execute("SELECT table_name FROM duckdb_tables()").fetchall()
+    }
+
+    is_stale = meta is None or staging_rows > meta[0] * (1 + TF_REFRESH_GROWTH)
+    if not refresh and not is_stale and all(f"tf_{col}" in existing for col in TF_COLUMNS):
+        logger.info("Reusing persisted TF tables.")
+        for col in TF_COLUMNS:
+            linker.table_management.register_term_frequency_lookup(
+                conn.table(f"tf_{col}"), col
+            )
+        return
+
+    logger.info("Computing TF tables over staging_identitas...")
+    for col, tf_table in _compute_tf_tables(linker).items():
+        conn.sql(f"CREATE OR REPLACE TABLE tf_{col} AS SELECT * FROM {tf_table.physical_name}")
+    conn.sql("DELETE FROM tf_tables_meta")
+    conn.execute("INSERT INTO tf_tables_meta (STAGING_ROWS) VALUES (?)", [staging_rows])
+
+
+def _estimate_u_in_chunks(
+    linker: Linker,
+    max_pairs: float,
+    num_chunks: int,
+    record_count: int,
+    seed: Optional[int] = None,
+):
+    """
+    Estimate u probabilities from up to `num_chunks` independent samples of
+    max_pairs / num_chunks pairs each, so only one chunk of sampled pairs is
+    materialised at a time. Stops early once every level has been observed
+    at least U_MIN_COUNT_PER_LEVEL times.
+
+    Each chunk appends to the levels' trained-u history; those entries are
+    replaced by their average so Splink's median-of-history picks it up.
+
+    Every chunk samples with its own seed (`seed + chunk`, `seed` drawn per
+    run if not given): Splink caches the sampled pairs by SQL, so repeated
+    unseeded calls on one linker reuse the first chunk's pairs table and
+    score almost nothing.
+    """
+    pairs_per_chunk = max_pairs / num_chunks
+    # A table smaller than the sample yields all of its pairs instead
+    expected_pairs = min(pairs_per_chunk, record_count * (record_count - 1) / 2)
+    if seed is None:
+        seed = int(np.random.default_rng().integers(2**31 - num_chunks))
+    cache = linker._intermediate_table_cache
+    levels = [
+        level
+        for comparison in linker._settings_obj.comparisons
+        for level in comparison._comparison_levels_excluding_null
+    ]
+    history_start = [len(level._trained_u_probabilities) for level in levels]
+
+    def chunk_u_sum(level, start):
+        return sum(
+            r["probability"]
+            for r in level._trained_u_probabilities[start:]
+            if isinstance(r["probability"], (int, float))
+        )
+
+    for chunk in range(num_chunks):
+        cache.reset_executed_queries_tracker()
+        linker.training.estimate_u_using_random_sampling(
+            max_pairs=pairs_per_chunk, seed=seed + chunk
+        )
+        chunk_pairs = _drop_sampled_pairs(linker)
+        if chunk_pairs < U_MIN_CHUNK_PAIRS_FRACTION * expected_pairs:
+            raise RuntimeError(
+                f"u estimation chunk {chunk + 1} sampled {chunk_pairs} pairs, "
+                f"expected about {int(expected_pairs)}."
+            )
+        min_u_sum = min(
+            chunk_u_sum(level, start) for level, start in zip(levels, history_start)
+        )
+        if min_u_sum * pairs_per_chunk >= U_MIN_COUNT_PER_LEVEL:
+            logger.info(f"u estimates converged after {chunk + 1} of {num_chunks} chunks.")
+            break
+
+    chunks_used = chunk + 1
+    for level, start in zip(levels, history_start):
+        u_sum = chunk_u_sum(level, start)
+        del level._trained_u_probabilities[start:]
+        level._add_trained_u_probability(
+            u_sum / chunks_used if u_sum > 0 else LEVEL_NOT_OBSERVED_TEXT,
+            "estimate u by random sampling",
+        )
+    linker._populate_m_u_from_trained_values()
+
+
+def _drop_sampled_pairs(linker: Linker) -> int:
+    """
+    Count and drop the pairs table the last u estimation sampled. Returns 0
+    if it did not build one (a cache hit on an earlier chunk's pairs).
+    """
+    for df in linker._intermediate_table_cache.executed_queries:
+        if df.templated_name == "__splink__blocked_id_pairs":
+            pairs = linker._db_api._execute_sql_against_backend(
+                f"SELECT COUNT(*) FROM {df.physical_name}"
+            ).fetchone()[0]
+            df.drop_table_from_database_and_remove_from_cache()
+            return pairs
+    return 0
+
+
+def _find_matches_capturing_sql(
+    linker: Linker,
+    new_records_table: str,
+    blocking_rules,
+    match_weight_threshold: float,
+) -> tuple[str, list[tuple[str, str]]]:
+    """
+    Run find_matches_to_new_records once and capture the SQL Splink executed.
+
+    Returns the predictions table name and the (table, sql) steps needed to
+    rebuild it. The SQL only refers to `new_records_table` by name, so later
+    batches can replay it with `_replay_match_sql` and skip Splink's planning.
+    """
+    cache = linker._intermediate_table_cache
+    cache.reset_executed_queries_tracker()
+    predictions = linker.inference.find_matches_to_new_records(
+        new_records_table,
+        blocking_rules=blocking_rules,
+        match_weight_threshold=match_weight_threshold,
+    )
+    steps = [
+        (df.physical_name, df.sql_used_to_create)
+        for df in cache.executed_queries
+        if df.templated_name in MATCH_SQL_STEPS
+    ]
+    return predictions.physical_name, steps
+
+
+def _replay_match_sql(
+    conn: duckdb.DuckDBPyConnection, steps: list[tuple[str, str]]
+) -> str:
+    """
+    Rebuild the predictions table from captured match SQL.
+    """
+    for table, sql in steps:
+        conn.sql(f"CREATE OR REPLACE TABLE {table} AS {sql}")
+    for table, _ in steps[:-1]:
+        conn.sql(f"DROP TABLE IF EXISTS {table}")
+    return steps[-1][0]
 
 
 def _stable_cluster_id(representative_id: str) -> int:
     """
     Convert representative string id to deterministic BIGINT.
     """
-    if representative_id.isdigit():
+    if representative_id.isascii() and representative_id.isdigit():
         value = int(representative_id)
-        if value <= 9_223_372_036_854_775_807:
+        if value <= INT64_MAX:
             return value
 
-    digest = hashlib.sha1(representative_id.encode("utf-8")).hexdigest()
-    return int(digest[:15], 16) % 9_223_372_036_854_775_807
+    digest = hashlib.blake2b(representative_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & INT64_MAX
 
 
-def _resolve_batch_assignments(
+def _register_hashed_cluster_ids(conn: duckdb.DuckDBPyConnection, name: str):
+    """
+    Register `name` (COMPONENT_ID, CLUSTER_ID) with `_stable_cluster_id` for the
+    batch's component ids that do not fit in BIGINT; the others are cast in SQL.
+    """
+    component_ids = (
+        conn.execute(
+            """
+            SELECT DISTINCT COMPONENT_ID
+            FROM batch_component_labels
+            WHERE NOT regexp_full_match(COMPONENT_ID, '[0-9]+')
+               OR TRY_CAST(COMPONENT_ID AS BIGINT) IS NULL
+        """
+        )
+        .fetch_arrow_table()
+        .column(0)
+        .to_pylist()
+    )
+    conn.register(
+        name,
+        pa.table(
+            {
+                "COMPONENT_ID": pa.array(component_ids, pa.string()),
+                "CLUSTER_ID": pa.array(
+                    [_stable_cluster_id(c) for c in component_ids], pa.int64()
+                ),
+            }
+        ),
+    )
+
+
+def _connected_components(
+    new_ids: np.ndarray, left_ids: np.ndarray, right_ids: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Label batch nodes with connected components over (left <-> right) edges.
+
+    Returns parallel `(nodes, labels)` arrays, where `labels[i]` is the integer
+    component of `nodes[i]`. Node ids are factorized to integers and labelled
+    by scipy's C implementation on a sparse adjacency matrix. Small edge sets
+    go through UnionFind instead.
+    """
+    if len(left_ids) < SPARSE_CC_MIN_EDGES:
+        uf = UnionFind()
+        for nid in new_ids:
+            uf.add(nid)
+        for l_id, r_id in zip(left_ids, right_ids):
+            uf.union(l_id, r_id)
+
+        nodes = np.array(list(uf.parent), dtype=object)
+        labels, _ = pd.factorize(np.array([uf.find(n) for n in nodes], dtype=object))
+        return nodes, labels
+
+    node_ids = np.concatenate([new_ids, left_ids, right_ids])
+    codes, uniques = pd.factorize(node_ids)
+
+    n_new = len(new_ids)
+    n_edges = len(left_ids)
+    l_idx = codes[n_new : n_new + n_edges]
+    r_idx = codes[n_new + n_edges :]
+
+    n_nodes = len(uniques)
+    adjacency = csr_matrix(
+        (np.ones(n_edges, dtype=np.int8), (l_idx, r_idx)),
+        shape=(n_nodes, n_nodes),
+    )
+    _, labels = connected_components(adjacency, directed=False)
+    return np.asarray(uniques, dtype=object), labels
+
+
+def _component_min_ids(nodes: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """
+    Map every node to the smallest node id in its component.
+
+    Nodes are sorted once; the first node seen for each label in that order
+    is the component minimum, so no per-component containers are built.
+    """
+    order = np.argsort(nodes, kind="stable")
+    sorted_labels = labels[order]
+    _, first = np.unique(sorted_labels, return_index=True)
+
+    component_min = np.empty(labels.max() + 1 if len(labels) else 0, dtype=object)
+    component_min[sorted_labels[first]] = nodes[order[first]]
+    return component_min[labels]
+
+
+def _label_components_in_db(
+    conn: duckdb.DuckDBPyConnection, new_records_table: str, filtered_pairs_table: str
+) -> bool:
+    """
+    Label every batch node with the smallest NOMOR_INDUK in its component.
+
+    Nodes are first interned into `batch_nodes` as BIGINT ids numbered in
+    NOMOR_INDUK order, so propagation joins and compares integers while the
+    smallest node id still maps back to the smallest NOMOR_INDUK. Each round
+    also hops to the label of the current label, so long chains converge in
+    far fewer rounds. The result lands in `batch_component_labels`; returns
+    False if no fixed point was reached within MAX_LABEL_ROUNDS.
+    """
+    conn.sql(
+        f"""
+        CREATE OR REPLACE TEMP TABLE batch_nodes AS
+        SELECT NOMOR_INDUK, ROW_NUMBER() OVER (ORDER BY NOMOR_INDUK) AS NODE_ID
+        FROM (
+            SELECT CAST(NOMOR_INDUK AS VARCHAR) AS NOMOR_INDUK FROM {new_records_table}
+            UNION
+            SELECT CAST(new_id AS VARCHAR) FROM {filtered_pairs_table}
+            UNION
+            SELECT CAST(candidate_id AS VARCHAR) FROM {filtered_pairs_table}
+        )
+    """
+    )
+    conn.sql(
+        f"""
+        CREATE OR REPLACE TEMP TABLE batch_edges AS
+        WITH e AS (
+            SELECT a.NODE_ID AS src, b.NODE_ID AS dst
+            FROM {filtered_pairs_table} p
+            JOIN batch_nodes a ON a.NOMOR_INDUK = CAST(p.new_id AS VARCHAR)
+            JOIN batch_nodes b ON b.NOMOR_INDUK = CAST(p.candidate_id AS VARCHAR)
+        )
+        SELECT src, dst FROM e
+        UNION ALL
+        SELECT dst, src FROM e
+    """
+    )
+    conn.sql(
+        """
+        CREATE OR REPLACE TEMP TABLE batch_node_labels AS
+        SELECT NODE_ID, NODE_ID AS LABEL FROM batch_nodes
+    """
+    )
+
+    converged = False
+    for _ in range(MAX_LABEL_ROUNDS):
+        changed = conn.execute(
+            """
+            UPDATE batch_node_labels AS l
+            SET LABEL = c.LABEL
+            FROM (
+                SELECT NODE_ID, MIN(LABEL) AS LABEL
+                FROM (
+                    SELECT e.src AS NODE_ID, n.LABEL
+                    FROM batch_edges e
+                    JOIN batch_node_labels n ON n.NODE_ID = e.dst
+                    UNION ALL
+                    SELECT cur.NODE_ID, hop.LABEL
+                    FROM batch_node_labels cur
+                    JOIN batch_node_labels hop ON hop.NODE_ID = cur.LABEL
+                )
+                GROUP BY NODE_ID
+            ) c
+            WHERE l.NODE_ID = c.NODE_ID
+              AND c.LABEL < l.LABEL
+        """
+        ).fetchone()[0]
+        if changed == 0:
+            converged = True
+            break
+
+    if not converged:
+        return False
+
+    conn.sql(
+        """
+        CREATE OR REPLACE TEMP TABLE batch_component_labels AS
+        SELECT n.NOMOR_INDUK, rep.NOMOR_INDUK AS COMPONENT_ID
+        FROM batch_node_labels l
+        JOIN batch_nodes n ON n.NODE_ID = l.NODE_ID
+        JOIN batch_nodes rep ON rep.NODE_ID = l.LABEL
+    """
+    )
+    return True
+
+
+def _label_components_in_python(
     conn: duckdb.DuckDBPyConnection,
-    new_records_df: pd.DataFrame,
+    new_records_table: str,
     filtered_pairs_table: str,
 ):
     """
-    Resolve CIF for a batch using connected components over (new_id <-> candidate_id) edges.
-
-    - If a component touches existing CIF(s), reuse the lexicographically smallest CIF.
-    - If a component touches multiple existing CIFs, merge them.
-    - If no existing CIF is present, generate CIF from min NOMOR_INDUK in the component.
+    Fallback for `_label_components_in_db` when propagation does not converge.
     """
-    new_ids = {str(x) for x in new_records_df["NOMOR_INDUK"].tolist()}
-
+    new_ids = (
+        conn.execute(f"SELECT CAST(NOMOR_INDUK AS VARCHAR) FROM {new_records_table}")
+        .fetch_arrow_table()
+        .column(0)
+        .to_numpy(zero_copy_only=False)
+    )
     pairs = conn.execute(
         f"""
         SELECT CAST(new_id AS VARCHAR) AS new_id, CAST(candidate_id AS VARCHAR) AS candidate_id
         FROM {filtered_pairs_table}
     """
-    ).fetchall()
+    ).fetch_arrow_table()
 
-    uf = UnionFind()
-    for nid in new_ids:
-        uf.add(nid)
+    left_ids = pairs.column("new_id").to_numpy(zero_copy_only=False)
+    right_ids = pairs.column("candidate_id").to_numpy(zero_copy_only=False)
+    nodes, labels = _connected_components(new_ids, left_ids, right_ids)
 
-    all_nodes = set(new_ids)
-    for l_id, r_id in pairs:
-        l_id = str(l_id)
-        r_id = str(r_id)
-        uf.union(l_id, r_id)
-        all_nodes.add(l_id)
-        all_nodes.add(r_id)
-
-    nodes_df = pd.DataFrame({"NOMOR_INDUK": list(all_nodes)})
-    conn.register("batch_component_nodes_df", nodes_df)
-    existing_cif_df = conn.execute(
+    labels_df = pd.DataFrame(
+        {"NOMOR_INDUK": nodes, "COMPONENT_ID": _component_min_ids(nodes, labels)}
+    )
+    _register_arrow(conn, "batch_component_labels_df", labels_df)
+    conn.sql(
         """
-        SELECT pc.NOMOR_INDUK, pc.CIF_NUMBER
-        FROM processed_clusters pc
-        INNER JOIN batch_component_nodes_df n ON n.NOMOR_INDUK = pc.NOMOR_INDUK
-    """
-    ).df()
-    conn.unregister("batch_component_nodes_df")
-
-    existing_cif_df = existing_cif_df.dropna(subset=["CIF_NUMBER"])
-    existing_cif_by_id = dict(
-        zip(
-            existing_cif_df["NOMOR_INDUK"].astype(str),
-            existing_cif_df["CIF_NUMBER"].astype(str),
-        )
+        CREATE OR REPLACE TEMP TABLE batch_component_labels AS
+        SELECT NOMOR_INDUK, COMPONENT_ID FROM batch_component_labels_df
+    """
     )
+    conn.unregister("batch_component_labels_df")
 
-    components: dict[str, set[str]] = {}
-    for node in all_nodes:
-        root = uf.find(node)
-        components.setdefault(root, set()).add(node)
 
-    assignment_rows = []
-    merge_rows = []
+def _resolve_batch_assignments(
+    conn: duckdb.DuckDBPyConnection,
+    new_records_table: str,
+    filtered_pairs_table: str,
+):
+    """
+    Resolve CIF for a batch using connected components over (new_id <-> candidate_id) edges.
 
-    for nodes in components.values():
-        new_members = [n for n in nodes if n in new_ids]
-        if not new_members:
-            continue
+    - If a component touches existing CIF(s), reuse the lexicographically smallest CIF.
+    - If a component touches multiple existing CIFs, merge them.
+    - If no existing CIF is present, generate CIF from min NOMOR_INDUK in the component.
 
-        existing_cifs = sorted(
-            {
-                existing_cif_by_id[n]
-                for n in nodes
-                if n in existing_cif_by_id and existing_cif_by_id[n]
-            }
+    Leaves the assignments in the `batch_assignments` temp table
+    (NOMOR_INDUK, CLUSTER_ID, CIF_NUMBER) and CIF merges in `batch_cif_merges`
+    (OLD_CIF, NEW_CIF).
+    """
+    if not _label_components_in_db(conn, new_records_table, filtered_pairs_table):
+        logger.warning(
+            "Component labelling did not converge in %s rounds; falling back to Python.",
+            MAX_LABEL_ROUNDS,
         )
+        _label_components_in_python(conn, new_records_table, filtered_pairs_table)
 
-        if existing_cifs:
-            canonical_cif = existing_cifs[0]
-            if len(existing_cifs) > 1:
-                for old_cif in existing_cifs[1:]:
-                    merge_rows.append((old_cif, canonical_cif))
-        else:
-            canonical_cif = f"CIF-{min(nodes)}"
-
-        representative_id = min(nodes)
-        cluster_id = _stable_cluster_id(representative_id)
-
-        for nid in new_members:
-            assignment_rows.append((nid, cluster_id, canonical_cif))
-
-    assignments_df = pd.DataFrame(
-        assignment_rows,
-        columns=["NOMOR_INDUK", "CLUSTER_ID", "CIF_NUMBER"],
+    conn.sql(
+        """
+        CREATE OR REPLACE TEMP TABLE batch_component_cifs AS
+        SELECT
+            l.COMPONENT_ID,
+            MIN(pc.CIF_NUMBER) AS CANONICAL_CIF,
+            LIST(DISTINCT pc.CIF_NUMBER) AS ALL_CIFS
+        FROM batch_component_labels l
+        JOIN processed_clusters pc ON pc.NOMOR_INDUK = l.NOMOR_INDUK
+        WHERE pc.CIF_NUMBER IS NOT NULL AND pc.CIF_NUMBER <> ''
+        GROUP BY l.COMPONENT_ID
+    """
     )
 
-    merges_df = pd.DataFrame(merge_rows, columns=["OLD_CIF", "NEW_CIF"])
-    if not merges_df.empty:
-        merges_df = merges_df[merges_df["OLD_CIF"] != merges_df["NEW_CIF"]].drop_duplicates()
+    _register_hashed_cluster_ids(conn, "batch_hashed_cluster_ids")
+    conn.sql(
+        f"""
+        CREATE OR REPLACE TEMP TABLE batch_assignments AS
+        SELECT
+            l.NOMOR_INDUK,
+            COALESCE(h.CLUSTER_ID, TRY_CAST(l.COMPONENT_ID AS BIGINT)) AS CLUSTER_ID,
+            COALESCE(c.CANONICAL_CIF, 'CIF-' || l.COMPONENT_ID) AS CIF_NUMBER
+        FROM batch_component_labels l
+        JOIN (
+            SELECT DISTINCT CAST(NOMOR_INDUK AS VARCHAR) AS NOMOR_INDUK FROM {new_records_table}
+        ) n ON n.NOMOR_INDUK = l.NOMOR_INDUK
+        LEFT JOIN batch_component_cifs c ON c.COMPONENT_ID = l.COMPONENT_ID
+        LEFT JOIN batch_hashed_cluster_ids h ON h.COMPONENT_ID = l.COMPONENT_ID
+    """
+    )
+    conn.unregister("batch_hashed_cluster_ids")
 
-    return assignments_df, merges_df, len(pairs)
+    conn.sql(
+        """
+        CREATE OR REPLACE TEMP TABLE batch_cif_merges AS
+        SELECT DISTINCT OLD_CIF, NEW_CIF
+        FROM (
+            SELECT UNNEST(ALL_CIFS) AS OLD_CIF, CANONICAL_CIF AS NEW_CIF
+            FROM batch_component_cifs
+        )
+        WHERE OLD_CIF <> NEW_CIF
+    """
+    )
 
 
 @app.command()
 def train(
     sample_size: int = 200000,
     u_max_pairs: int = 5000000,
+    u_chunks: int = typer.Option(
+        10,
+        min=1,
+        help="Split u-estimation sampling into this many chunks (lower peak memory).",
+    ),
     deterministic_recall: float = typer.Option(
         0.7,
         min=0.01,
@@ -267,6 +770,15 @@ def train(
         False,
         help="Retain matching/intermediate columns in model outputs (useful for debugging, slower for production).",
     ),
+    max_block_size: int = typer.Option(
+        10000,
+        min=0,
+        help="Skip blocking keys shared by more than this many sampled records during training (0 disables).",
+    ),
+    em_term_frequencies: bool = typer.Option(
+        False,
+        help="Apply term-frequency adjustments inside EM iterations (slower; EM otherwise runs on aggregated agreement patterns).",
+    ),
 ):
     """
     Train the deduplication model using unsupervised learning (EM).
@@ -276,6 +788,7 @@ def train(
 
     # Check if we have enough data
     try:
+        ensure_blocking_keys(conn)
         count = conn.execute("SELECT COUNT(*) FROM staging_identitas").fetchone()[0]
     except duckdb.CatalogException:
         logger.error("Table staging_identitas not found. Run 'etl extract' first.")
@@ -307,19 +820,33 @@ def train(
     _compute_tf_tables(linker)
 
     logger.info("Estimating u probabilities...")
-    linker.training.estimate_u_using_random_sampling(max_pairs=int(u_max_pairs))
+    _estimate_u_in_chunks(linker, int(u_max_pairs), u_chunks, sample_n)
+
+    if max_block_size > 0:
+        em_rules = get_capped_blocking_rules(
+            conn, max_block_size, "splink_training_sample", on_key_columns=False
+        )
+        nik_rule = get_capped_blocking_rules(
+            conn, max_block_size, "splink_training_sample", salted=False, on_key_columns=False
+        )[BLOCKING_KEYS.index(("NIK",))]
+    else:
+        em_rules = get_em_training_rules()
+        nik_rule = block_on("NIK")
 
     logger.info("Estimating probability_two_random_records_match...")
     linker.training.estimate_probability_two_random_records_match(
-        deterministic_matching_rules=[block_on("NIK")],
+        deterministic_matching_rules=[nik_rule],
         recall=deterministic_recall,
         max_rows_limit=1_000_000_000,
     )
 
     logger.info("Estimating m probabilities via EM...")
-    for rule in get_em_training_rules():
+    for rule in em_rules:
         try:
-            linker.training.estimate_parameters_using_expectation_maximisation(rule)
+            linker.training.estimate_parameters_using_expectation_maximisation(
+                rule,
+                estimate_without_term_frequencies=not em_term_frequencies,
+            )
         except Exception as e:
             logger.warning(f"EM training step failed for rule {rule}: {e}")
 
@@ -355,6 +882,15 @@ def run(
         -4.0,
         help="Low-level Splink prefilter for find_matches_to_new_records.",
     ),
+    max_block_size: int = typer.Option(
+        10000,
+        min=0,
+        help="Skip blocking keys shared by more than this many records (0 disables).",
+    ),
+    refresh_tf: bool = typer.Option(
+        False,
+        help="Recompute persisted term-frequency tables even if they are still fresh.",
+    ),
 ):
     """
     Incremental deduplication for new records only.
@@ -376,10 +912,25 @@ def run(
     with open(MODEL_PATH, "r") as f:
         model_settings = json.load(f)
 
+    try:
+        ensure_unprocessed_queue(conn)
+        ensure_blocking_keys(conn)
+    except duckdb.CatalogException:
+        logger.error("Table staging_identitas not found.")
+        return
+
     linker = Linker("staging_identitas", model_settings, db_api)
-    _compute_tf_tables(linker)
+    _load_or_compute_tf_tables(conn, linker, refresh=refresh_tf)
+
+    if max_block_size > 0:
+        blocking_rules = get_capped_blocking_rules(conn, max_block_size)
+    else:
+        blocking_rules = model_settings.get("blocking_rules_to_generate_predictions")
+        if not blocking_rules:
+            blocking_rules = get_blocking_rules()
 
     total_processed = 0
+    match_sql_steps = None
 
     while True:
         if limit is not None and total_processed >= limit:
@@ -390,39 +941,43 @@ def run(
             current_batch_size = min(current_batch_size, limit - total_processed)
 
         try:
-            new_records_df = conn.execute(
+            conn.sql(
                 f"""
-                SELECT *
-                FROM staging_identitas
-                WHERE PROCESSED_AT IS NULL
-                ORDER BY NOMOR_INDUK
-                LIMIT {current_batch_size}
+                CREATE OR REPLACE TEMP TABLE new_records_batch AS
+                SELECT s.*
+                FROM staging_identitas s
+                JOIN (
+                    SELECT NOMOR_INDUK
+                    FROM unprocessed_ids
+                    ORDER BY NOMOR_INDUK
+                    LIMIT {current_batch_size}
+                ) u ON u.NOMOR_INDUK = s.NOMOR_INDUK
+                ORDER BY s.NOMOR_INDUK
             """
-            ).df()
+            )
         except duckdb.CatalogException:
             logger.error("Table staging_identitas not found.")
             return
 
-        if len(new_records_df) == 0:
+        batch_count = conn.execute("SELECT COUNT(*) FROM new_records_batch").fetchone()[0]
+        if batch_count == 0:
             if total_processed == 0:
                 logger.info("No new records to process.")
             break
 
-        logger.info(f"Processing batch of {len(new_records_df)} records...")
-
-        conn.register("new_records_batch_df", new_records_df)
-
-        blocking_rules = model_settings.get("blocking_rules_to_generate_predictions")
-        if not blocking_rules:
-            blocking_rules = get_blocking_rules()
+        logger.info(f"Processing batch of {batch_count} records...")
 
-        pairwise_predictions = linker.inference.find_matches_to_new_records(
-            "new_records_batch_df",
-            blocking_rules=blocking_rules,
-            match_weight_threshold=match_weight_threshold,
-        )
+        if match_sql_steps is None:
+            predictions_table, match_sql_steps = _find_matches_capturing_sql(
+                linker,
+                "new_records_batch",
+                blocking_rules,
+                match_weight_threshold,
+            )
+        else:
+            predictions_table = _replay_match_sql(conn, match_sql_steps)
 
-        conn.execute(
+        conn.sql(
             f"""
             CREATE OR REPLACE TEMP TABLE batch_pairs AS
             WITH raw_pairs AS (
@@ -430,13 +985,13 @@ def run(
                     CAST(NOMOR_INDUK_l AS VARCHAR) AS id_l,
                     CAST(NOMOR_INDUK_r AS VARCHAR) AS id_r,
                     match_probability
-                FROM {pairwise_predictions.physical_name}
+                FROM {predictions_table}
                 WHERE NOMOR_INDUK_l <> NOMOR_INDUK_r
                   AND match_probability >= {threshold}
             ),
             new_ids AS (
                 SELECT CAST(NOMOR_INDUK AS VARCHAR) AS NOMOR_INDUK
-                FROM new_records_batch_df
+                FROM new_records_batch
             )
             SELECT DISTINCT
                 CASE WHEN nl.NOMOR_INDUK IS NOT NULL THEN rp.id_l ELSE rp.id_r END AS new_id,
@@ -448,12 +1003,10 @@ def run(
             WHERE nl.NOMOR_INDUK IS NOT NULL OR nr.NOMOR_INDUK IS NOT NULL
         """
         )
-        conn.unregister("new_records_batch_df")
 
-        pair_count = conn.execute("SELECT COUNT(*) FROM batch_pairs").fetchone()[0]
-        matched_new_count = conn.execute(
-            "SELECT COUNT(DISTINCT new_id) FROM batch_pairs"
-        ).fetchone()[0]
+        pair_count, matched_new_count = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT new_id) FROM batch_pairs"
+        ).fetchone()
 
         logger.info(
             f"Batch edges above threshold: {pair_count:,} | New records with >=1 match: {matched_new_count:,}"
@@ -466,55 +1019,62 @@ def run(
                 pair_count,
                 max_pairs_per_batch,
             )
-            pairwise_predictions.drop_table_from_database_and_remove_from_cache()
+            conn.sql(f"DROP TABLE IF EXISTS {predictions_table}")
             raise typer.Exit(code=1)
 
-        assignments_df, merges_df, _ = _resolve_batch_assignments(
+        _resolve_batch_assignments(
             conn,
-            new_records_df,
+            "new_records_batch",
             "batch_pairs",
         )
 
-        if not merges_df.empty:
-            conn.register("cif_merges_df", merges_df)
-            conn.execute(
+        merge_count = conn.execute("SELECT COUNT(*) FROM batch_cif_merges").fetchone()[0]
+        if merge_count:
+            conn.sql(
                 """
                 UPDATE processed_clusters pc
                 SET CIF_NUMBER = m.NEW_CIF
-                FROM cif_merges_df m
+                FROM batch_cif_merges m
                 WHERE pc.CIF_NUMBER = m.OLD_CIF
             """
             )
-            conn.unregister("cif_merges_df")
-            logger.info(f"Merged {len(merges_df):,} CIF mapping(s) due to bridged components.")
+            logger.info(f"Merged {merge_count:,} CIF mapping(s) due to bridged components.")
 
-        conn.register("batch_assignments_df", assignments_df)
-        conn.execute(
+        conn.sql(
             """
-            INSERT OR REPLACE INTO processed_clusters (NOMOR_INDUK, CLUSTER_ID, CIF_NUMBER, PROCESSED_AT)
+            INSERT INTO processed_clusters (NOMOR_INDUK, CLUSTER_ID, CIF_NUMBER, PROCESSED_AT)
             SELECT
                 NOMOR_INDUK,
                 CLUSTER_ID,
                 CIF_NUMBER,
                 NOW()
-            FROM batch_assignments_df
+            FROM batch_assignments
+            ON CONFLICT (NOMOR_INDUK) DO UPDATE SET
+                CLUSTER_ID = EXCLUDED.CLUSTER_ID,
+                CIF_NUMBER = EXCLUDED.CIF_NUMBER,
+                PROCESSED_AT = EXCLUDED.PROCESSED_AT
         """
         )
-        conn.unregister("batch_assignments_df")
 
-        conn.register("processed_ids_df", new_records_df[["NOMOR_INDUK"]])
-        conn.execute(
+        conn.sql(
             """
-            UPDATE staging_identitas
+            UPDATE staging_identitas s
             SET PROCESSED_AT = NOW()
-            WHERE NOMOR_INDUK IN (SELECT NOMOR_INDUK FROM processed_ids_df)
+            FROM new_records_batch p
+            WHERE s.NOMOR_INDUK = p.NOMOR_INDUK
+        """
+        )
+        conn.sql(
+            """
+            DELETE FROM unprocessed_ids u
+            USING new_records_batch p
+            WHERE u.NOMOR_INDUK = p.NOMOR_INDUK
         """
         )
-        conn.unregister("processed_ids_df")
 
-        pairwise_predictions.drop_table_from_database_and_remove_from_cache()
+        conn.sql(f"DROP TABLE IF EXISTS {predictions_table}")
 
-        total_processed += len(new_records_df)
+        total_processed += batch_count
         logger.info(f"Batch complete. Total processed in this run: {total_processed:,}")
 
     if total_processed > 0:
@@ -2,7 +2,7 @@ import pandas as pd
 import polars as pl
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from dedupe_gemini.db import get_engine
 from dedupe_gemini.deduplication import get_duckdb_conn
 import typer
@@ -27,15 +27,21 @@ def analyze(
     if source.lower() == "mariadb":
         print(f"Connecting to MariaDB to fetch {sample_size} random records...")
         engine = get_engine()
-        query = f"""
-        SELECT 
-            NOMOR_INDUK, NAMA_LENGKAP, NIK, TANGGAL_LAHIR, ID_JENIS_KELAMIN, 
-            ALAMAT, ID_UPT, RESIDIVIS
-        FROM identitas 
-        ORDER BY RAND() 
-        LIMIT {sample_size}
-        """
         try:
+            with engine.connect() as conn:
+                total_rows = conn.execute(text("SELECT COUNT(*) FROM identitas")).scalar()
+            # Keep ~1.2x the sample (plus a margin for small samples) with a cheap
+            # per-row filter, so only those rows are shuffled instead of the whole table
+            fraction = min(1.0, (1.2 * sample_size + 100) / max(total_rows, 1))
+            query = f"""
+            SELECT 
+                NOMOR_INDUK, NAMA_LENGKAP, NIK, TANGGAL_LAHIR, ID_JENIS_KELAMIN, 
+                ALAMAT, ID_UPT, RESIDIVIS
+            FROM identitas 
+            WHERE RAND() < {fraction}
+            ORDER BY RAND() 
+            LIMIT {sample_size}
+            """
             df = pl.read_database(query=query, connection=engine)
         except Exception as e:
             print(f"Error reading MariaDB: {e}")
@@ -70,9 +76,29 @@ def analyze(
 
     print(f"Loaded {len(df)} records into Polars DataFrame.")
 
+    # Every statistic below is evaluated in one parallel pass over the sample
+    lf = df.lazy()
+    (
+        null_counts,
+        nik_dups,
+        name_dob_dups,
+        lengths,
+        top_names,
+        top_upts,
+    ) = pl.collect_all([
+        lf.null_count(),
+        lf.filter(pl.col("NIK").is_not_null()).group_by("NIK").len().filter(pl.col("len") > 1),
+        lf.group_by(["NAMA_LENGKAP", "TANGGAL_LAHIR"]).len().filter(pl.col("len") > 1),
+        lf.select(
+            pl.col("NAMA_LENGKAP").str.len_chars().alias("name_len"),
+            pl.col("ALAMAT").str.len_chars().alias("addr_len")
+        ),
+        lf.group_by("NAMA_LENGKAP").len("count").sort("count", descending=True).head(5),
+        lf.group_by("ID_UPT").len("count").sort("count", descending=True).head(5),
+    ])
+
     # 1. Missing Values Analysis
     print("\n--- Missing Values Analysis ---")
-    null_counts = df.null_count()
     print(null_counts)
     
     # Visualize Missing Values
@@ -88,27 +114,21 @@ def analyze(
     # 2. Duplicate Analysis (Exact Matches)
     print("\n--- Exact Duplicate Analysis ---")
     # Check for exact duplicates on NIK (which should be unique ideally)
-    nik_dups = df.filter(pl.col("NIK").is_not_null()).group_by("NIK").len().filter(pl.col("len") > 1)
     print(f"Records sharing the same NIK: {nik_dups.sum().select('len').item() if not nik_dups.is_empty() else 0}")
     
     # Check for exact duplicates on Name + DOB
-    name_dob_dups = df.group_by(["NAMA_LENGKAP", "TANGGAL_LAHIR"]).len().filter(pl.col("len") > 1)
     print(f"Records sharing Name + DOB: {name_dob_dups.sum().select('len').item() if not name_dob_dups.is_empty() else 0}")
 
     # 3. Text Length Distribution
     print("\n--- Text Length Analysis ---")
-    df = df.with_columns(
-        pl.col("NAMA_LENGKAP").str.len_chars().alias("name_len"),
-        pl.col("ALAMAT").str.len_chars().alias("addr_len")
-    )
     
     plt.figure(figsize=(12, 5))
     plt.subplot(1, 2, 1)
-    sns.histplot(df["name_len"], bins=30, kde=True)
+    sns.histplot(lengths["name_len"], bins=30, kde=True)
     plt.title("Name Length Distribution")
     
     plt.subplot(1, 2, 2)
-    sns.histplot(df["addr_len"].drop_nulls(), bins=30, kde=True)
+    sns.histplot(lengths["addr_len"].drop_nulls(), bins=30, kde=True)
     plt.title("Address Length Distribution")
     
     plt.tight_layout()
@@ -118,10 +138,10 @@ def analyze(
     # 4. Top Value Counts
     print("\n--- Top Value Counts ---")
     print("Top 5 Most Common Names:")
-    print(df["NAMA_LENGKAP"].value_counts().sort("count", descending=True).head(5))
+    print(top_names)
     
     print("\nTop 5 UPTs:")
-    print(df["ID_UPT"].value_counts().sort("count", descending=True).head(5))
+    print(top_upts)
 
     # Save summary report
     with open(f"{output_dir}/summary.txt", "w") as f:
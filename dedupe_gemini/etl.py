@@ -1,13 +1,18 @@
 import typer
 import duckdb
+from duckdb.sqltypes import VARCHAR
+import pyarrow as pa
 import os
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
-from datetime import datetime
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from sqlalchemy import create_engine, text
-from dedupe_gemini.db import get_engine
+from dedupe_gemini.db import (
+    get_engine, duckdb_config, ensure_unprocessed_queue, ensure_blocking_keys,
+    BLOCKING_KEYS, blocking_key_column, blocking_key_sql,
+)
 from dedupe_gemini.config import load_config
 import re
 from unidecode import unidecode
@@ -27,7 +32,7 @@ STATE_FILE = "data/etl_state.json"
 
 def get_duckdb_conn():
     os.makedirs("data", exist_ok=True)
-    conn = duckdb.connect(DUCKDB_PATH)
+    conn = duckdb.connect(DUCKDB_PATH, config=duckdb_config())
     # Ensure staging table exists
     conn.execute("""
         CREATE TABLE IF NOT EXISTS staging_identitas (
@@ -46,6 +51,8 @@ def get_duckdb_conn():
             PROCESSED_AT TIMESTAMP DEFAULT NULL
         )
     """)
+    ensure_unprocessed_queue(conn)
+    ensure_blocking_keys(conn)
     return conn
 
 def load_state() -> dict:
@@ -58,44 +65,106 @@ def save_state(state: dict):
     with open(STATE_FILE, "w") as f:
         json.dump(state, f)
 
+# Titles (basic list for Indonesia). Applied one after another: removing one
+# title can expose another (e.g. "s.alm. e" -> "s.e").
+_TITLE_PATTERNS = [
+    re.compile(pattern)
+    for pattern in [
+        r"\bdr\.\s*", r"\bdrs\.\s*", r"\bir\.\s*", r"\bh\.\s*", r"\bhj\.\s*",
+        r"\balm\.\s*", r"\bbin\b", r"\bbinti\b", r"\bs\.kom\b", r"\bs\.e\b",
+        r"\bm\.kom\b", r"\bprof\.\s*", r"\bpdt\.\s*"
+    ]
+]
+
+# Common abbreviations, expanded in a single pass
+_REPLACEMENTS = [
+    (r"\bjl\b", "jalan"),
+    (r"\bjln\b", "jalan"),
+    (r"\bds\b", "desa"),
+    (r"\bkec\b", "kecamatan"),
+    (r"\bkel\b", "kelurahan"),
+    (r"\bkab\b", "kabupaten"),
+    (r"\bprop\b", "provinsi"),
+    (r"\bno\.\s*", "nomor "),
+]
+_REPLACEMENTS_RE = re.compile("|".join(f"({pattern})" for pattern, _ in _REPLACEMENTS))
+_REPLACEMENT_VALUES = [None] + [replacement for _, replacement in _REPLACEMENTS]
+
+# Special chars and whitespace runs both collapse to a single space
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+def transliterate(text: str) -> str:
+    """
+    Lowercase, strip and transliterate to ASCII (steps 1-2 of `normalize_text`).
+    """
+    return unidecode(text.lower().strip())
+
 def normalize_text(text: Optional[str]) -> Optional[str]:
     if not text:
         return None
     
-    # 1. Lowercase and strip
-    text = text.lower().strip()
+    # 1-2. Lowercase, strip and remove accents/non-ascii
+    text = transliterate(text)
     
-    # 2. Remove accents/non-ascii
-    text = unidecode(text)
-    
-    # 3. Remove titles (basic list for Indonesia)
-    titles = [
-        r"\bdr\.\s*", r"\bdrs\.\s*", r"\bir\.\s*", r"\bh\.\s*", r"\bhj\.\s*", 
-        r"\balm\.\s*", r"\bbin\b", r"\bbinti\b", r"\bs\.kom\b", r"\bs\.e\b", 
-        r"\bm\.kom\b", r"\bprof\.\s*", r"\bpdt\.\s*"
-    ]
-    for pattern in titles:
-        text = re.sub(pattern, "", text)
+    # 3. Remove titles
+    for pattern in _TITLE_PATTERNS:
+        text = pattern.sub("", text)
         
     # 4. Standardize common abbreviations
-    replacements = {
-        r"\bjl\b": "jalan",
-        r"\bjln\b": "jalan",
-        r"\bds\b": "desa",
-        r"\bkec\b": "kecamatan",
-        r"\bkel\b": "kelurahan",
-        r"\bkab\b": "kabupaten",
-        r"\bprop\b": "provinsi",
-        r"\bno\.\s*": "nomor "
-    }
-    for pattern, replacement in replacements.items():
-        text = re.sub(pattern, replacement, text)
+    text = _REPLACEMENTS_RE.sub(lambda m: _REPLACEMENT_VALUES[m.lastindex], text)
         
     # 5. Remove extra spaces and special chars
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    
-    return text
+    return _NON_ALNUM_RE.sub(" ", text).strip()
+
+# Python's \s for ASCII text, spelled out for DuckDB's RE2 regexes
+_SQL_WHITESPACE = r"[\t\n\x0b\x0c\r\x1c-\x1f ]"
+
+# Text that is already normalized: lowercase words separated by single spaces,
+# with none of the title/abbreviation rules that can match without a '.'
+_SQL_CLEAN = "[a-z0-9]+( [a-z0-9]+)*"
+_SQL_WORD_RULES = "|".join(
+    pattern
+    for pattern in [p.pattern for p in _TITLE_PATTERNS] + [p for p, _ in _REPLACEMENTS]
+    if r"\." not in pattern
+)
+
+def normalize_sql(column: str) -> str:
+    """
+    DuckDB expression equivalent to `normalize_text(column)`.
+
+    The title/abbreviation rules run as vectorized regexp_replace calls.
+    ASCII values only need lower(), and skip the rules entirely when already
+    clean; anything else is first passed through the `transliterate` UDF
+    registered by `register_normalize_udf`.
+    """
+    expr = f"""CASE
+        WHEN strlen({column}) = length({column}) THEN lower({column})
+        ELSE transliterate({column})
+    END"""
+    for pattern in _TITLE_PATTERNS:
+        sql_pattern = pattern.pattern.replace(r"\s", _SQL_WHITESPACE)
+        expr = f"regexp_replace({expr}, '{sql_pattern}', '', 'g')"
+    for pattern, replacement in _REPLACEMENTS:
+        sql_pattern = pattern.replace(r"\s", _SQL_WHITESPACE)
+        expr = f"regexp_replace({expr}, '{sql_pattern}', '{replacement}', 'g')"
+    expr = f"trim(regexp_replace({expr}, '[^a-z0-9]+', ' ', 'g'))"
+
+    return f"""CASE
+        WHEN {column} IS NULL OR {column} = '' THEN NULL
+        WHEN strlen({column}) = length({column})
+            AND regexp_full_match(lower({column}), '{_SQL_CLEAN}')
+            AND NOT regexp_matches(lower({column}), '{_SQL_WORD_RULES}')
+            THEN lower({column})
+        ELSE {expr}
+    END"""
+
+def register_normalize_udf(conn: duckdb.DuckDBPyConnection):
+    """
+    Expose `transliterate` to DuckDB for the non-ASCII branch of `normalize_sql`.
+    """
+    conn.create_function(
+        "transliterate", transliterate, [VARCHAR], VARCHAR, side_effects=False
+    )
 
 @app.command()
 def extract(
@@ -180,26 +249,56 @@ def extract(
             logger.warning("Custom query missing :last_id or :limit placeholders. This might cause issues.")
         base_query = custom_query
     
+    duck_conn.execute("""
+        CREATE OR REPLACE TEMP TABLE etl_batch (
+            NOMOR_INDUK VARCHAR,
+            NAMA_LENGKAP VARCHAR,
+            NIK VARCHAR,
+            TANGGAL_LAHIR DATE,
+            ID_JENIS_KELAMIN VARCHAR,
+            ALAMAT VARCHAR,
+            ID_UPT VARCHAR,
+            NM_AYAH VARCHAR,
+            NM_IBU VARCHAR
+        )
+    """)
+    register_normalize_udf(duck_conn)
+    blocking_keys = ", ".join(
+        f"{blocking_key_sql(cols)} AS {blocking_key_column(cols)}" for cols in BLOCKING_KEYS
+    )
+
+    def fetch_batch(last_id):
+        # Use SQLAlchemy text() for safe parameter binding
+        result = source_conn.execute(text(base_query), {**params, "last_id": last_id})
+        columns, rows = list(result.keys()), result.fetchall()
+        # End the read transaction so each batch sees a fresh snapshot
+        source_conn.rollback()
+        return columns, rows
+
+    # One source connection for the whole run, used only by the fetcher thread
+    try:
+        source_conn = engine.connect()
+    except Exception as e:
+        logger.error(f"Database error: {e}")
+        duck_conn.close()
+        return
+
     total_processed = 0
     
-    with Progress(
+    with source_conn, Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         transient=True
-    ) as progress:
+    ) as progress, ThreadPoolExecutor(max_workers=1) as fetcher:
         task = progress.add_task("Extracting...", total=None)
+        # The next batch is fetched from the source while the current one is
+        # normalized and loaded into DuckDB
+        pending = fetcher.submit(fetch_batch, params["last_id"])
         
         while True:
-            # Check global limit
-            if limit and total_processed >= limit:
-                break
-                
-            # Fetch Batch
+            # Wait for the batch
             try:
-                with engine.connect() as conn:
-                    # Use SQLAlchemy text() for safe parameter binding
-                    result = conn.execute(text(base_query), params)
-                    rows = result.fetchall()
+                columns, rows = pending.result()
             except Exception as e:
                 logger.error(f"Database error: {e}")
                 break
@@ -207,62 +306,68 @@ def extract(
             if not rows:
                 logger.info("No more records found.")
                 break
+
+            # Transpose once; the columns feed both the cursor and the Arrow table
+            values = dict(zip(columns, zip(*rows)))
+            # Same ordering as MAX() over the VARCHAR staging column
+            max_id_in_batch = max(
+                (str(v) for v in values["NOMOR_INDUK"] if v is not None),
+                default=None,
+            )
+            more = len(rows) >= batch_size and not (limit and total_processed + len(rows) >= limit)
+            if more:
+                pending = fetcher.submit(fetch_batch, max_id_in_batch)
                 
-            # Process Batch
-            processed_data = []
-            max_id_in_batch = start_id
-            
-            for row in rows:
-                # Normalization
-                clean_nama = normalize_text(row.NAMA_LENGKAP)
-                clean_alamat = normalize_text(row.ALAMAT)
-                clean_ayah = normalize_text(row.NM_AYAH)
-                clean_ibu = normalize_text(row.NM_IBU)
-                
-                processed_data.append((
-                    row.NOMOR_INDUK,
-                    row.NAMA_LENGKAP,
-                    row.NIK,
-                    row.TANGGAL_LAHIR,
-                    row.ID_JENIS_KELAMIN,
-                    row.ALAMAT,
-                    row.ID_UPT,
-                    clean_nama,
-                    clean_alamat,
-                    clean_ayah,
-                    clean_ibu,
-                    datetime.now(),
-                    None
-                ))
-                
-                if row.NOMOR_INDUK > max_id_in_batch:
-                    max_id_in_batch = row.NOMOR_INDUK
-            
-            # Load into DuckDB
-            if processed_data:
-                try:
-                    # executemany is cleaner for bulk insert
-                    duck_conn.executemany("""
-                        INSERT OR REPLACE INTO staging_identitas 
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, processed_data)
-                    
-                    # Update state
-                    params["last_id"] = max_id_in_batch
-                    state["last_processed_id"] = max_id_in_batch
-                    save_state(state)
-                    
-                    total_processed += len(processed_data)
-                    progress.update(task, description=f"Extracted {total_processed} records. Last ID: {max_id_in_batch}")
-                    
-                except Exception as e:
-                    logger.error(f"DuckDB Insert Error: {e}")
-                    # Could break or continue?
-                    # If we break here, we can resume from previous batch end
-                    break
+            # Load raw rows as one Arrow table; normalization runs inside DuckDB
+            try:
+                raw_batch = pa.Table.from_arrays(
+                    [pa.array(column) for column in values.values()], names=list(values)
+                )
+                duck_conn.register("raw_batch", raw_batch)
+                duck_conn.execute("DELETE FROM etl_batch")
+                duck_conn.execute("""
+                    INSERT INTO etl_batch
+                    SELECT
+                        NOMOR_INDUK, NAMA_LENGKAP, NIK, TANGGAL_LAHIR, ID_JENIS_KELAMIN,
+                        ALAMAT, ID_UPT, NM_AYAH, NM_IBU
+                    FROM raw_batch
+                """)
+                duck_conn.unregister("raw_batch")
+                duck_conn.execute(f"""
+                    INSERT OR REPLACE INTO staging_identitas BY NAME
+                    SELECT *, {blocking_keys}
+                    FROM (
+                        SELECT
+                            NOMOR_INDUK, NAMA_LENGKAP, NIK, TANGGAL_LAHIR, ID_JENIS_KELAMIN,
+                            ALAMAT, ID_UPT,
+                            {normalize_sql("NAMA_LENGKAP")} AS CLEAN_NAMA,
+                            {normalize_sql("ALAMAT")} AS CLEAN_ALAMAT,
+                            {normalize_sql("NM_AYAH")} AS CLEAN_NM_AYAH,
+                            {normalize_sql("NM_IBU")} AS CLEAN_NM_IBU,
+                            NOW() AS EXTRACTED_AT,
+                            NULL AS PROCESSED_AT
+                        FROM etl_batch
+                    )
+                """)
+                # (Re-)extracted rows are unprocessed again
+                duck_conn.execute(
+                    "INSERT OR IGNORE INTO unprocessed_ids SELECT NOMOR_INDUK FROM etl_batch"
+                )
+
+                # Update state
+                state["last_processed_id"] = max_id_in_batch
+                save_state(state)
+
+                total_processed += len(rows)
+                progress.update(task, description=f"Extracted {total_processed} records. Last ID: {max_id_in_batch}")
+
+            except Exception as e:
+                logger.error(f"DuckDB Insert Error: {e}")
+                # If we break here, we can resume from previous batch end
+                break
             
-            if len(rows) < batch_size:
-                # Last page
+            if not more:
+                # Last page (or limit reached)
                 break
                 
     logger.info(f"Extraction complete. Total records: {total_processed}")
@@ -1,18 +1,201 @@
-import random
+import os
+import re
+import tempfile
+import threading
 import time
-from typing import List, Dict, Any
-import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from multiprocessing import Pool
+from typing import Iterator, List, Dict, Optional, Tuple, Union
+import numpy as np
 import typer
-from sqlalchemy import text, inspect
+from sqlalchemy import create_engine, event, inspect, text
 from faker import Faker
+from faker.providers import BaseProvider
+from faker.utils.distribution import choices_distribution
 from rich.progress import track
 from dedupe_gemini.db import get_engine
 
 fake = Faker('id_ID')
 
-def generate_nik(dob: datetime.date, gender: str) -> str:
+_faker_random_element = BaseProvider.random_element
+
+def _cached_random_element(self, elements=("a", "b", "c")):
+    """
+    BaseProvider.random_element that caches an OrderedDict's keys and weights
+    on the dict instead of rebuilding both tuples on every pick. The weighted
+    format tables behind names, addresses and cities hit this on every call.
+    """
+    if not isinstance(elements, dict):
+        return _faker_random_element(self, elements)
+    cached = getattr(elements, "_choice_cache", None)
+    if cached is None:
+        cached = elements._choice_cache = (tuple(elements.keys()), tuple(elements.values()))
+    choices, weights = cached
+    if not self.__use_weighting__:
+        weights = None
+    return choices_distribution(choices, weights, self.generator.random, length=1)[0]
+
+BaseProvider.random_element = _cached_random_element
+
+# Faker costs tens of microseconds per call, so row generation draws from pools
+# of values generated once per seed run (see build_pools).
+POOL_SIZE = 100_000
+
+_POOL_FACTORIES = {
+    "name_male": fake.name_male,
+    "name_female": fake.name_female,
+    "name": fake.name,
+    "first_name": fake.first_name,
+    "date_of_birth": lambda: fake.date_of_birth(minimum_age=17, maximum_age=80),
+    "city": fake.city,
+    "address": fake.address,
+    "job": fake.job,
+    "word": fake.word,
+    "date": fake.date,
+    "date_time_this_decade": fake.date_time_this_decade,
+    "date_time_this_year": fake.date_time_this_year,
+}
+
+_pools: Dict[str, np.ndarray] = {}
+
+# Random generator for work done in this process (the pools); each generated
+# batch gets its own seeded generator
+_rng = np.random.default_rng()
+
+# Columns of a seeded `identitas` row, in table order. Columns the generator
+# always leaves empty (the *_LAIN codes, extra aliases, photos, ...) are not
+# sent at all; the table fills them with NULL, or its default for IS_DELETED.
+_COLUMNS = (
+    'NOMOR_INDUK', 'ID_JENIS_SUKU', 'ID_JENIS_RAMBUT', 'ID_JENIS_MUKA',
+    'ID_JENIS_PENDIDIKAN', 'ID_JENIS_TANGAN', 'ID_JENIS_AGAMA', 'ID_JENIS_PEKERJAAN',
+    'ID_USER', 'ID_BENTUK_MATA', 'ID_WARNA_MATA', 'ID_JENIS_KEAHLIAN_1',
+    'ID_JENIS_KEAHLIAN_2', 'ID_JENIS_HIDUNG', 'ID_JENIS_LEVEL_1', 'ID_JENIS_MULUT',
+    'ID_JENIS_LEVEL_2', 'ID_JENIS_WARGANEGARA', 'ID_PROPINSI',
+    'ID_JENIS_STATUS_PERKAWINAN', 'ID_JENIS_KELAMIN', 'ID_JENIS_KAKI',
+    'ID_TEMPAT_LAHIR', 'ID_KOTA', 'ID_TEMPAT_ASAL', 'RESIDIVIS', 'RESIDIVIS_COUNTER',
+    'NAMA_LENGKAP', 'NIK', 'NAMA_ALIAS1', 'NAMA_KECIL1', 'TANGGAL_LAHIR',
+    'IS_WBP_BERESIKO_TINGGI', 'IS_PENGARUH_TERHADAP_MASYARAKAT', 'ALAMAT', 'KODEPOS',
+    'TELEPON', 'ALAMAT_PEKERJAAN', 'KETERANGAN_PEKERJAAN', 'MINAT', 'NM_AYAH',
+    'TMP_TGL_AYAH', 'NM_IBU', 'TMP_TGL_IBU', 'NM_SAUDARA', 'ANAKKE', 'JML_SAUDARA',
+    'JML_ISTRI_SUAMI', 'NM_ISTRI_SUAMI', 'TMP_TGL_ISTRI_SUAMI', 'JML_ANAK', 'NM_ANAK',
+    'TELEPHONE_KELUARGA', 'TINGGI', 'BERAT', 'KONSOLIDASI', 'KONSOLIDASI_IMAGE',
+    'ID_KACAMATA', 'ID_TELINGA', 'ID_WARNAKULIT', 'ID_BENTUKRAMBUT', 'ID_BENTUKBIBIR',
+    'ID_LENGAN', 'NOMOR_INDUK_NASIONAL', 'IS_VERIFIKASI', 'CREATED', 'CREATED_BY',
+    'UPDATED', 'UPDATED_BY', 'ID_UPT',
+)
+
+# Position of each column in a record tuple
+_COL = {c: i for i, c in enumerate(_COLUMNS)}
+
+@lru_cache
+def _insert_sql(paramstyle: str) -> str:
+    """
+    Positional INSERT of a full record tuple, in the driver's own placeholder
+    style for cursor.executemany.
+    """
+    marker = "?" if paramstyle == "qmark" else "%s"
+    return (
+        f"INSERT INTO identitas ({', '.join(_COLUMNS)}) "
+        f"VALUES ({', '.join([marker] * len(_COLUMNS))})"
+    )
+
+# Batches written to the database concurrently while workers generate more
+INSERT_THREADS = 2
+
+def build_pools(size: int = POOL_SIZE):
+    """
+    Pre-generate `size` Faker values per field for `generate_base_records`.
+    Values repeat across rows, which is fine for synthetic data; small seed
+    runs pass a smaller size so they don't pay for the full pools.
     """
-    Generate a valid-looking Indonesian NIK (Nomor Induk Kependudukan).
+    size = max(1, size)
+    for key, factory in _POOL_FACTORIES.items():
+        # Object arrays, so a batch's picks are one fancy-index
+        _pools[key] = np.array([factory() for _ in range(size)], dtype=object)
+    # "<city>, <date>" birth place and date of family members (TMP_TGL_*)
+    cities = _pick(_rng, "city", size)
+    _pools["tmp_tgl"] = np.array(
+        [f"{city}, {date}" for city, date in zip(cities, _pools["date"])], dtype=object
+    )
+    # (DD, MM, YY) of each birth date, for building NIKs a batch at a time
+    _pools["dob_parts"] = np.array(
+        [(d.day, d.month, d.year % 100) for d in _pools["date_of_birth"]], dtype=np.int64
+    )
+
+def _pick(rng: np.random.Generator, key: str, n: int) -> np.ndarray:
+    # `n` random values from pool `key`
+    pool = _pools[key]
+    return pool[rng.integers(0, len(pool), size=n)]
+
+# Random integer fields as (column, low, high), both ends inclusive. They are
+# drawn for a whole batch with one numpy call (see generate_base_records).
+# Codes are stored as strings, counts as ints.
+_CODE_FIELDS = (
+    ("ID_JENIS_SUKU", 1, 100),
+    ("ID_JENIS_RAMBUT", 1, 10),
+    ("ID_JENIS_MUKA", 1, 10),
+    ("ID_JENIS_PENDIDIKAN", 1, 10),
+    ("ID_JENIS_TANGAN", 1, 5),
+    ("ID_JENIS_AGAMA", 1, 6),
+    ("ID_JENIS_PEKERJAAN", 1, 20),
+    ("ID_USER", 1, 100),
+    ("ID_BENTUK_MATA", 1, 10),
+    ("ID_WARNA_MATA", 1, 10),
+    ("ID_JENIS_KEAHLIAN_1", 1, 50),
+    ("ID_JENIS_KEAHLIAN_2", 1, 50),
+    ("ID_JENIS_HIDUNG", 1, 10),
+    ("ID_JENIS_LEVEL_1", 1, 5),
+    ("ID_JENIS_MULUT", 1, 10),
+    ("ID_JENIS_LEVEL_2", 1, 5),
+    ("ID_PROPINSI", 1, 34),
+    ("ID_JENIS_STATUS_PERKAWINAN", 1, 4),
+    ("ID_JENIS_KAKI", 1, 5),
+    ("ID_KACAMATA", 1, 5),
+    ("ID_TELINGA", 1, 5),
+    ("ID_WARNAKULIT", 1, 5),
+    ("ID_BENTUKRAMBUT", 1, 5),
+    ("ID_BENTUKBIBIR", 1, 5),
+    ("ID_LENGAN", 1, 5),
+)
+
+_COUNT_FIELDS = (
+    ("RESIDIVIS_COUNTER", 0, 5),
+    ("ANAKKE", 1, 10),
+    ("JML_SAUDARA", 1, 10),
+    ("JML_ISTRI_SUAMI", 0, 2),
+    ("JML_ANAK", 0, 5),
+    ("TINGGI", 150, 190),
+    ("BERAT", 45, 100),
+)
+
+# Probability of each per-row yes/no draw, in the order generate_base_records
+# unpacks them.
+_FLAG_PROBABILITIES = (
+    0.5,  # female
+    0.9,  # WNI citizen
+    0.2,  # residivis
+    0.2,  # has an alias
+    0.1,  # IS_WBP_BERESIKO_TINGGI
+    0.1,  # IS_PENGARUH_TERHADAP_MASYARAKAT
+    0.5,  # has a work address
+)
+
+def _draw_ints(rng: np.random.Generator, fields, n: int) -> np.ndarray:
+    low = np.array([f[1] for f in fields])
+    high = np.array([f[2] for f in fields])
+    return rng.integers(low, high, size=(n, len(fields)), endpoint=True)
+
+def _phone_numbers(rng: np.random.Generator, n: int) -> np.ndarray:
+    # 08 mobile prefix followed by 10 digits
+    digits = rng.integers(0, 10**10, size=n).astype(str)
+    return np.char.add("08", np.char.zfill(digits, 10))
+
+def generate_niks(rng: np.random.Generator, dob_parts: np.ndarray, female: np.ndarray) -> np.ndarray:
+    """
+    Generate valid-looking Indonesian NIKs (Nomor Induk Kependudukan) for a
+    batch, one per row of `dob_parts` (day, month, 2-digit year).
     Format: PPKKCCDDMMYYSSSS
     PP: Province (11-92)
     KK: City/Regency (01-99)
@@ -22,175 +205,250 @@ def generate_nik(dob: datetime.date, gender: str) -> str:
     YY: Year (00-99)
     SSSS: Serial (0001-9999)
     """
-    prov = random.randint(11, 92)
-    city = random.randint(1, 99)
-    dist = random.randint(1, 99)
-    
-    day = dob.day
-    if gender == 'P':
-        day += 40
-        
-    month = dob.month
-    year = dob.year % 100
-    
-    serial = random.randint(1, 9999)
-    
-    return f"{prov:02d}{city:02d}{dist:02d}{day:02d}{month:02d}{year:02d}{serial:04d}"
+    n = len(dob_parts)
+    prov = rng.integers(11, 92, size=n, endpoint=True)
+    city = rng.integers(1, 99, size=n, endpoint=True)
+    dist = rng.integers(1, 99, size=n, endpoint=True)
+    serial = rng.integers(1, 9999, size=n, endpoint=True)
+    day = dob_parts[:, 0] + np.where(female, 40, 0)
 
-def generate_identity_keys(index: int) -> Dict[str, str]:
+    # PP is never below 11, so the 16 digits fit an int64 without losing a
+    # leading zero
+    nik = prov
+    for part, width in ((city, 2), (dist, 2), (day, 2), (dob_parts[:, 1], 2), (dob_parts[:, 2], 2), (serial, 4)):
+        nik = nik * 10 ** width + part
+    return nik.astype(str)
+
+def generate_identity_keys(rng: np.random.Generator, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Generate unique NOMOR_INDUK and matching ID_UPT based on index.
+    Generate unique NOMOR_INDUK and matching ID_UPT for a batch of indices.
     Format: UUUYYYYMMDDSSSS
     UUU: ID UPT (3 digits)
     YYYYMMDD: Registration Date
     SSSS: Sequence (4 digits)
     """
     # Base date for simulation (e.g., starting from 2010)
-    start_date = datetime.date(2010, 1, 1)
+    start_date = np.datetime64('2010-01-01', 'D')
     
     # We allow up to 9999 records per day to fit in SSSS
     records_per_day = 5000 # Safe margin
     
-    day_offset = index // records_per_day
-    seq = (index % records_per_day) + 1
-    
-    reg_date = start_date + datetime.timedelta(days=day_offset)
+    reg_date = start_date + indices // records_per_day
+    seq = indices % records_per_day + 1
     
-    # Generate random UPT code (e.g., 001 to 099)
-    # Using a subset of UPTs to make it realistic (simulating 50 UPTs)
-    upt_int = random.randint(1, 50)
-    upt_code = f"{upt_int:03d}"
+    year = reg_date.astype('datetime64[Y]').astype(np.int64) + 1970
+    month_start = reg_date.astype('datetime64[M]')
+    month = month_start.astype(np.int64) % 12 + 1
+    day = (reg_date - month_start).astype(np.int64) + 1
+    # Years from 2010 on keep YYYYMMDDSSSS at 12 digits without leading zeros
+    date_seq = ((year * 100 + month) * 100 + day) * 10000 + seq
     
-    nomor_induk = f"{upt_code}{reg_date.strftime('%Y%m%d')}{seq:04d}"
+    # Random UPT codes, simulating 50 UPTs (001 to 050)
+    upt_codes = np.char.zfill(rng.integers(1, 50, size=len(indices), endpoint=True).astype(str), 3)
     
-    return {
-        "NOMOR_INDUK": nomor_induk,
-        "ID_UPT": upt_code
-    }
+    nomor_induk = np.char.add(upt_codes, date_seq.astype(str))
+    return nomor_induk, upt_codes
 
-def generate_base_record(index: int) -> Dict[str, Any]:
-    gender = random.choice(['L', 'P'])
-    name = fake.name_male() if gender == 'L' else fake.name_female()
-    dob = fake.date_of_birth(minimum_age=17, maximum_age=80)
-    nik = generate_nik(dob, gender)
-    
-    keys = generate_identity_keys(index)
-    
-    return {
-        'NOMOR_INDUK': keys['NOMOR_INDUK'],
-        'ID_JENIS_SUKU': str(random.randint(1, 100)),
-        'ID_JENIS_SUKU_LAIN': None,
-        'ID_JENIS_RAMBUT': str(random.randint(1, 10)),
-        'ID_JENIS_MUKA': str(random.randint(1, 10)),
-        'ID_JENIS_PENDIDIKAN': str(random.randint(1, 10)),
-        'ID_JENIS_TANGAN': str(random.randint(1, 5)),
-        'ID_JENIS_AGAMA': str(random.randint(1, 6)),
-        'ID_JENIS_AGAMA_LAIN': None,
-        'ID_JENIS_PEKERJAAN': str(random.randint(1, 20)),
-        'ID_JENIS_PEKERJAAN_LAIN': None,
-        'ID_USER': str(random.randint(1, 100)),
-        'ID_BENTUK_MATA': str(random.randint(1, 10)),
-        'ID_WARNA_MATA': str(random.randint(1, 10)),
-        'ID_JENIS_KEAHLIAN_1': str(random.randint(1, 50)),
-        'ID_JENIS_KEAHLIAN_1_LAIN': None,
-        'ID_JENIS_KEAHLIAN_2': str(random.randint(1, 50)),
-        'ID_JENIS_KEAHLIAN_2_LAIN': None,
-        'ID_JENIS_HIDUNG': str(random.randint(1, 10)),
-        'ID_JENIS_LEVEL_1': str(random.randint(1, 5)),
-        'ID_JENIS_MULUT': str(random.randint(1, 10)),
-        'ID_JENIS_LEVEL_2': str(random.randint(1, 5)),
-        'ID_JENIS_WARGANEGARA': 'WNI' if random.random() > 0.1 else 'WNA',
-        'ID_NEGARA_ASING': None,
-        'ID_PROPINSI': str(random.randint(1, 34)),
-        'ID_PROPINSI_LAIN': None,
-        'ID_JENIS_STATUS_PERKAWINAN': str(random.randint(1, 4)),
-        'ID_JENIS_KELAMIN': gender,
-        'ID_JENIS_KAKI': str(random.randint(1, 5)),
-        'ID_TEMPAT_LAHIR': fake.city(),
-        'ID_TEMPAT_LAHIR_LAIN': None,
-        'ID_KOTA': fake.city(),
-        'ID_KOTA_LAIN': None,
-        'ID_TEMPAT_ASAL': fake.city(),
-        'ID_TEMPAT_ASAL_LAIN': None,
-        'RESIDIVIS': '1' if random.random() > 0.8 else '0',
-        'RESIDIVIS_COUNTER': random.randint(0, 5),
-        'NAMA_LENGKAP': name,
-        'NIK': nik,
-        'NAMA_ALIAS1': fake.first_name() if random.random() > 0.8 else None,
-        'NAMA_ALIAS2': None,
-        'NAMA_ALIAS3': None,
-        'NAMA_KECIL1': fake.first_name(),
-        'NAMA_KECIL2': None,
-        'NAMA_KECIL3': None,
-        'TANGGAL_LAHIR': dob,
-        'IS_WBP_BERESIKO_TINGGI': 1 if random.random() > 0.9 else 0,
-        'IS_PENGARUH_TERHADAP_MASYARAKAT': 1 if random.random() > 0.9 else 0,
-        'ALAMAT': fake.address(),
-        'ALAMAT_ALTERNATIF': None,
-        'KODEPOS': fake.postcode(),
-        'TELEPON': fake.phone_number(),
-        'ALAMAT_PEKERJAAN': fake.address() if random.random() > 0.5 else None,
-        'KETERANGAN_PEKERJAAN': fake.job(),
-        'MINAT': fake.word(),
-        'NM_AYAH': fake.name_male(),
-        'TMP_TGL_AYAH': f"{fake.city()}, {fake.date()}",
-        'NM_IBU': fake.name_female(),
-        'TMP_TGL_IBU': f"{fake.city()}, {fake.date()}",
-        'NM_SAUDARA': fake.name(),
-        'ANAKKE': random.randint(1, 10),
-        'JML_SAUDARA': random.randint(1, 10),
-        'JML_ISTRI_SUAMI': random.randint(0, 2),
-        'NM_ISTRI_SUAMI': fake.name(),
-        'TMP_TGL_ISTRI_SUAMI': f"{fake.city()}, {fake.date()}",
-        'JML_ANAK': random.randint(0, 5),
-        'NM_ANAK': fake.name(),
-        'TELEPHONE_KELUARGA': fake.phone_number(),
-        'TINGGI': random.randint(150, 190),
-        'BERAT': random.randint(45, 100),
-        'CACAT': None,
-        'CIRI': None,
-        'FOTO_DEPAN': None,
-        'FOTO_KANAN': None,
-        'FOTO_KIRI': None,
-        'FOTO_CIRI_1': None,
-        'FOTO_CIRI_2': None,
-        'FOTO_CIRI_3': None,
-        'KONSOLIDASI': 0,
-        'KONSOLIDASI_IMAGE': 0,
-        'ID_KACAMATA': str(random.randint(1, 5)),
-        'ID_TELINGA': str(random.randint(1, 5)),
-        'ID_WARNAKULIT': str(random.randint(1, 5)),
-        'ID_BENTUKRAMBUT': str(random.randint(1, 5)),
-        'ID_BENTUKBIBIR': str(random.randint(1, 5)),
-        'ID_LENGAN': str(random.randint(1, 5)),
-        'NOMOR_INDUK_NASIONAL': generate_nik(dob, gender),
-        'IS_VERIFIKASI': 1,
-        'IS_DELETED': 0,
-        'CREATED': fake.date_time_this_decade(),
-        'CREATED_BY': 'admin',
-        'UPDATED': fake.date_time_this_year(),
-        'UPDATED_BY': 'admin',
-        'ID_UPT': keys['ID_UPT']
+def generate_base_records(rng: np.random.Generator, start_id: int, n: int) -> List[tuple]:
+    """
+    Generate records `start_id .. start_id + n - 1`, one tuple per record in
+    `_COLUMNS` order. Every column is drawn for the whole batch at once.
+    """
+    nomor_induk, id_upt = generate_identity_keys(rng, np.arange(start_id, start_id + n))
+    codes = _draw_ints(rng, _CODE_FIELDS, n).astype(str)
+    counts = _draw_ints(rng, _COUNT_FIELDS, n)
+    female, wni, residivis, has_alias, beresiko, pengaruh, has_work_address = (
+        rng.random((len(_FLAG_PROBABILITIES), n)) < np.array(_FLAG_PROBABILITIES)[:, None]
+    )
+
+    dob_idx = rng.integers(0, len(_pools["date_of_birth"]), size=n)
+    dob_parts = _pools["dob_parts"][dob_idx]
+
+    columns = {
+        'NOMOR_INDUK': nomor_induk,
+        **{name: codes[:, j] for j, (name, _, _) in enumerate(_CODE_FIELDS)},
+        **{name: counts[:, j] for j, (name, _, _) in enumerate(_COUNT_FIELDS)},
+        'ID_JENIS_WARGANEGARA': np.where(wni, 'WNI', 'WNA'),
+        'ID_JENIS_KELAMIN': np.where(female, 'P', 'L'),
+        'ID_TEMPAT_LAHIR': _pick(rng, 'city', n),
+        'ID_KOTA': _pick(rng, 'city', n),
+        'ID_TEMPAT_ASAL': _pick(rng, 'city', n),
+        'RESIDIVIS': np.where(residivis, '1', '0'),
+        'NAMA_LENGKAP': np.where(female, _pick(rng, 'name_female', n), _pick(rng, 'name_male', n)),
+        'NIK': generate_niks(rng, dob_parts, female),
+        'NAMA_ALIAS1': np.where(has_alias, _pick(rng, 'first_name', n), None),
+        'NAMA_KECIL1': _pick(rng, 'first_name', n),
+        'TANGGAL_LAHIR': _pools["date_of_birth"][dob_idx],
+        'IS_WBP_BERESIKO_TINGGI': beresiko.astype(int),
+        'IS_PENGARUH_TERHADAP_MASYARAKAT': pengaruh.astype(int),
+        'ALAMAT': _pick(rng, 'address', n),
+        # Postcodes and mobile numbers are plain digit strings, no Faker needed
+        'KODEPOS': rng.integers(10000, 99999, size=n, endpoint=True).astype(str),
+        'TELEPON': _phone_numbers(rng, n),
+        'ALAMAT_PEKERJAAN': np.where(has_work_address, _pick(rng, 'address', n), None),
+        'KETERANGAN_PEKERJAAN': _pick(rng, 'job', n),
+        'MINAT': _pick(rng, 'word', n),
+        'NM_AYAH': _pick(rng, 'name_male', n),
+        'TMP_TGL_AYAH': _pick(rng, 'tmp_tgl', n),
+        'NM_IBU': _pick(rng, 'name_female', n),
+        'TMP_TGL_IBU': _pick(rng, 'tmp_tgl', n),
+        'NM_SAUDARA': _pick(rng, 'name', n),
+        'NM_ISTRI_SUAMI': _pick(rng, 'name', n),
+        'TMP_TGL_ISTRI_SUAMI': _pick(rng, 'tmp_tgl', n),
+        'NM_ANAK': _pick(rng, 'name', n),
+        'TELEPHONE_KELUARGA': _phone_numbers(rng, n),
+        'KONSOLIDASI': np.zeros(n, dtype=int),
+        'KONSOLIDASI_IMAGE': np.zeros(n, dtype=int),
+        'NOMOR_INDUK_NASIONAL': generate_niks(rng, dob_parts, female),
+        'IS_VERIFIKASI': np.ones(n, dtype=int),
+        'CREATED': _pick(rng, 'date_time_this_decade', n),
+        'CREATED_BY': np.full(n, 'admin'),
+        'UPDATED': _pick(rng, 'date_time_this_year', n),
+        'UPDATED_BY': np.full(n, 'admin'),
+        'ID_UPT': id_upt,
     }
+    # tolist() hands the driver plain str/int/date values
+    return list(zip(*(columns[c].tolist() for c in _COLUMNS)))
+
+def _init_worker(pools: Dict[str, np.ndarray]):
+    # Forked workers already share the parent's pools; spawned ones need a copy
+    if not _pools:
+        _pools.update(pools)
+
+def _generate_chunk(chunk: tuple) -> Union[List[tuple], str]:
+    """
+    Generate the records of one batch. Without a `spool_dir` they are
+    returned as a list; with one they are written straight to a TSV file
+    there for LOAD DATA and its path is returned, so the batch never goes
+    back to the parent process as Python objects.
+    """
+    start_id, n, duplicates, seed, spool_dir = chunk
+    records = _chunk_records(start_id, n, duplicates, seed)
+    if spool_dir is None:
+        return list(records)
+
+    path = os.path.join(spool_dir, f"{start_id}.tsv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.writelines(map(_tsv_line, records))
+    return path
+
+def _chunk_records(start_id: int, n: int, duplicates: float, seed) -> Iterator[tuple]:
+    """
+    Yield `n` records numbered from `start_id`. Duplicates are copies of
+    earlier records in the same batch.
+    """
+    rng = np.random.default_rng(seed)
+    base_records = generate_base_records(rng, start_id, n)
+
+    MAX_RECENT = 1000
+    recent_records = deque(maxlen=MAX_RECENT)
+
+    # Duplicate decisions for the whole batch: whether a row copies a recent
+    # record, which one (as a fraction of the window), whether its name gets
+    # a typo and where, and whether its address changes
+    is_dup = (rng.random(n) < duplicates).tolist()
+    pick_at = rng.random(n).tolist()
+    has_typo = (rng.random(n) < 0.5).tolist()
+    typo_at = rng.random(n).tolist()
+    moved = (rng.random(n) < 0.5).tolist()
+    new_addresses = _pick(rng, 'address', n).tolist()
+
+    for i, base_record in enumerate(base_records):
+        if is_dup[i] and recent_records:
+            # Pick a record to duplicate
+            original = recent_records[int(pick_at[i] * len(recent_records))]
+            record = list(original)
+            
+            # Apply slight modifications to simulate realistic duplicates
+            if has_typo[i]:
+                 # Typo in name: swap two characters
+                 name = list(record[_COL['NAMA_LENGKAP']])
+                 if len(name) > 3:
+                     idx = int(typo_at[i] * (len(name) - 1))
+                     name[idx], name[idx+1] = name[idx+1], name[idx]
+                     record[_COL['NAMA_LENGKAP']] = "".join(name)
+            
+            if moved[i]:
+                # Different address
+                record[_COL['ALAMAT']] = new_addresses[i]
+                
+            # Must have unique PK though, and consistent ID_UPT
+            record[_COL['NOMOR_INDUK']] = base_record[_COL['NOMOR_INDUK']]
+            record[_COL['ID_UPT']] = base_record[_COL['ID_UPT']]
+            record = tuple(record)
+            
+        else:
+            record = base_record
+        
+        recent_records.append(record)
+        yield record
+
+SCHEMA_FILE = "database/init/01-schema.sql"
+
+_table_ready = False
+
+def _split_sql(sql: str) -> List[str]:
+    """
+    Split a SQL script into statements on semicolons outside quotes and
+    `--` comments.
+    """
+    statements, current = [], []
+    quote = None
+    i = 0
+    while i < len(sql):
+        ch = sql[i]
+        if quote:
+            if ch == "\\" and quote != "`":
+                current.append(sql[i:i + 2])
+                i += 2
+                continue
+            if ch == quote:
+                quote = None
+        elif ch in "'\"`":
+            quote = ch
+        elif sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = len(sql) if end == -1 else end
+            continue
+        elif ch == ";":
+            statements.append("".join(current).strip())
+            current = []
+            i += 1
+            continue
+        current.append(ch)
+        i += 1
+    statements.append("".join(current).strip())
+    return [st for st in statements if st]
+
+@lru_cache
+def _schema_statements() -> Tuple[str, ...]:
+    # Table DDL from the schema file, read once; database-level statements
+    # are skipped since the engine already points at the database
+    with open(SCHEMA_FILE, "r") as f:
+        statements = _split_sql(f.read())
+    return tuple(
+        st for st in statements
+        if not st.upper().startswith("USE") and not st.upper().startswith("CREATE DATABASE")
+    )
 
 def ensure_table_exists(engine):
     """
     Check if the 'identitas' table exists. If not, create it.
+    Only checked once per process.
     """
+    global _table_ready
+    if _table_ready:
+        return
+
     inspector = inspect(engine)
     if not inspector.has_table("identitas"):
         print("Table 'identitas' not found. Creating it now...")
         
         try:
-            with open("database/init/01-schema.sql", "r") as f:
-                schema_sql = f.read()
-                
-            statements = schema_sql.split(';')
+            statements = _schema_statements()
             with engine.begin() as conn:
                 for statement in statements:
-                    statement = statement.strip()
-                    if statement and not statement.upper().startswith("USE") and not statement.upper().startswith("CREATE DATABASE"):
-                        conn.execute(text(statement))
+                    conn.execute(text(statement))
             print("Table 'identitas' created successfully.")
         except Exception as e:
             print(f"Failed to create table: {e}")
@@ -202,6 +460,7 @@ def ensure_table_exists(engine):
             print("Adding missing column 'ID_UPT' to 'identitas'...")
             with engine.begin() as conn:
                 conn.execute(text("ALTER TABLE identitas ADD COLUMN ID_UPT VARCHAR(50)"))
+    _table_ready = True
 
 def _create_table_fallback(engine):
     sql = """
@@ -314,9 +573,10 @@ def _get_current_count(engine) -> int:
     except Exception:
         return 0
 
-def seed_command(count: int = 1000, duplicates: float = 0.0, batch_size: int = 1000):
+def seed_command(count: int = 1000, duplicates: float = 0.0, batch_size: int = 1000, workers: Optional[int] = None):
     """
-    Seed the database with synthetic data.
+    Seed the database with synthetic data. Records are generated in `workers`
+    processes (default: one per CPU), one batch per task.
     """
     engine = get_engine()
     
@@ -357,68 +617,196 @@ def seed_command(count: int = 1000, duplicates: float = 0.0, batch_size: int = 1
     ensure_table_exists(engine)
 
     print(f"Seeding {count} records with {duplicates*100}% duplicates...")
-    
-    batch = []
-    recent_records = []
-    MAX_RECENT = 1000
+    build_pools(min(count, POOL_SIZE))
     
     # Start ID based on existing count to avoid collisions and continue sequence
     start_id = _get_current_count(engine)
+    seed_engine = _seed_engine(engine)
+    write_engine = seed_engine or engine
+    insert_sql = _insert_sql(write_engine.dialect.paramstyle)
+    use_load_data = seed_engine is not None
+    fallback_lock = threading.Lock()
+    # LOAD DATA batches are spooled to disk by the workers; files are removed
+    # once loaded, the directory at the end of the run
+    spool = tempfile.TemporaryDirectory(prefix="seed-") if use_load_data else None
+    spool_dir = spool.name if spool is not None else None
 
-    for i in track(range(count), description="Generating records..."):
-        current_id = start_id + i
-        
-        # Decide if we generate a duplicate
-        if recent_records and random.random() < duplicates:
-            # Pick a record to duplicate
-            original = random.choice(recent_records)
-            record = original.copy()
-            
-            # Apply slight modifications to simulate realistic duplicates
-            if random.random() > 0.5:
-                 # Typo in name: swap two characters
-                 name = list(record['NAMA_LENGKAP'])
-                 if len(name) > 3:
-                     idx = random.randint(0, len(name)-2)
-                     name[idx], name[idx+1] = name[idx+1], name[idx]
-                     record['NAMA_LENGKAP'] = "".join(name)
-            
-            if random.random() > 0.5:
-                # Different address
-                record['ALAMAT'] = fake.address()
-                
-            # Must have unique PK though, and consistent ID_UPT
-            new_keys = generate_identity_keys(current_id)
-            record['NOMOR_INDUK'] = new_keys['NOMOR_INDUK']
-            record['ID_UPT'] = new_keys['ID_UPT']
-            
+    # Each insert thread holds one connection for the whole run instead of a
+    # pool checkout (and pre-ping) per batch; batches still commit one by one
+    # so a failed run leaves only whole batches behind
+    thread_state = threading.local()
+    connections = []
+
+    def connection():
+        raw = getattr(thread_state, "raw", None)
+        if raw is None:
+            raw = thread_state.raw = write_engine.raw_connection()
+            connections.append(raw)
+        return raw
+
+    def load_spooled(raw, path) -> bool:
+        nonlocal use_load_data
+        if use_load_data:
+            try:
+                _load_data_file(raw, path)
+                return True
+            except write_engine.dialect.loaded_dbapi.Error as e:
+                with fallback_lock:
+                    if use_load_data:
+                        print(f"LOAD DATA LOCAL INFILE unavailable ({e}); falling back to INSERT batches.")
+                        use_load_data = False
+        return False
+
+    def flush(batch):
+        raw = connection()
+        if isinstance(batch, str):
+            try:
+                if load_spooled(raw, batch):
+                    return
+                records = _read_tsv(batch)
+            finally:
+                os.unlink(batch)
         else:
-            record = generate_base_record(current_id)
-        
-        batch.append(record)
-        recent_records.append(record)
-        
-        if len(recent_records) > MAX_RECENT:
-            recent_records.pop(0)
-            
-        if len(batch) >= batch_size:
-            _insert_batch(engine, batch)
-            batch = []
-            
-    if batch:
-        _insert_batch(engine, batch)
+            records = batch
+        _insert_batch(raw, insert_sql, records)
+
+    # One chunk per batch, each with its own seed so workers don't share a
+    # random stream
+    offsets = range(0, count, batch_size)
+    seeds = np.random.SeedSequence().spawn(len(offsets))
+    chunks = [
+        (start_id + offset, min(batch_size, count - offset), duplicates, seed, spool_dir)
+        for offset, seed in zip(offsets, seeds)
+    ]
+
+    try:
+        _run_pipeline(chunks, workers or os.cpu_count() or 1, flush)
+    finally:
+        for raw in connections:
+            raw.close()
+        if seed_engine is not None:
+            seed_engine.dispose()
+        if spool is not None:
+            spool.cleanup()
         
     print("Seeding complete.")
 
-def _insert_batch(engine, records: List[Dict]):
+def _run_pipeline(chunks: List[tuple], workers: int, flush):
+    """
+    Generate `chunks` in worker processes and pass each finished batch, in
+    order, to `flush` on one of INSERT_THREADS threads.
+    """
+    # Workers generate ahead while the threads write; both stages cap the
+    # batches in flight so generated records can't pile up in memory
+    max_generating = 2 * workers
+    max_inserting = 2 * INSERT_THREADS
+    with Pool(workers, initializer=_init_worker, initargs=(_pools,)) as pool, \
+            ThreadPoolExecutor(max_workers=INSERT_THREADS) as inserters:
+        generating = deque()
+        inserting = deque()
+
+        def insert_next():
+            inserting.append(inserters.submit(flush, generating.popleft().get()))
+            if len(inserting) >= max_inserting:
+                inserting.popleft().result()
+
+        for chunk in track(chunks, description="Generating records..."):
+            generating.append(pool.apply_async(_generate_chunk, (chunk,)))
+            if len(generating) >= max_generating:
+                insert_next()
+        while generating:
+            insert_next()
+        while inserting:
+            inserting.popleft().result()
+
+def _execute_batch(raw, execute):
+    # One batch, one transaction on a held DBAPI connection
+    cursor = raw.cursor()
+    try:
+        execute(cursor)
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def _insert_batch(raw, insert_sql: str, records: List[tuple]):
     if not records:
         return
         
-    keys = list(records[0].keys())
-    # Construct INSERT statement
-    columns = ', '.join(keys)
-    placeholders = ', '.join([f":{k}" for k in keys])
-    sql = text(f"INSERT INTO identitas ({columns}) VALUES ({placeholders})")
-    
-    with engine.begin() as conn:
-        conn.execute(sql, records)
+    # Straight to the DBAPI cursor: the MySQL drivers rewrite executemany of
+    # an INSERT ... VALUES into multi-row INSERTs
+    _execute_batch(raw, lambda cursor: cursor.executemany(insert_sql, records))
+
+# Connect argument that lets each MySQL driver send LOAD DATA LOCAL files
+_LOCAL_INFILE_ARGS = {
+    "pymysql": "local_infile",
+    "mysqldb": "local_infile",
+    "mysqlconnector": "allow_local_infile",
+}
+
+_LOAD_DATA_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"})
+_LOAD_DATA_UNESCAPES = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r", "0": "\0"}
+
+def _seed_engine(engine):
+    """
+    A separate engine on the seed database for bulk writes, or None for
+    non-MySQL backends. Its connections may use LOAD DATA LOCAL INFILE and
+    skip per-row unique and foreign-key checks; both stay off on the shared
+    engine, only seeding needs them.
+    """
+    url = engine.url
+    arg = _LOCAL_INFILE_ARGS.get(url.get_driver_name())
+    if url.get_backend_name() not in ("mysql", "mariadb") or arg is None:
+        return None
+    connect_args = {arg: True}
+    if "charset" not in url.query:
+        connect_args["charset"] = "utf8mb4"
+    seed_engine = create_engine(url, connect_args=connect_args, pool_size=INSERT_THREADS)
+
+    @event.listens_for(seed_engine, "connect")
+    def _bulk_session(dbapi_connection, connection_record):
+        # Generated NOMOR_INDUKs are unique by construction, and identitas has
+        # no foreign keys; the PK itself is still enforced
+        cursor = dbapi_connection.cursor()
+        cursor.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+        cursor.close()
+
+    return seed_engine
+
+def _tsv_field(value) -> str:
+    if value is None:
+        return "\\N"
+    return str(value).translate(_LOAD_DATA_ESCAPES)
+
+def _tsv_line(record: tuple) -> str:
+    return "\t".join(map(_tsv_field, record)) + "\n"
+
+def _read_tsv(path: str) -> List[tuple]:
+    # Back from a spooled file to records for the INSERT fallback; values stay
+    # strings, which MySQL converts on insert
+    with open(path, encoding="utf-8", newline="") as f:
+        return [
+            tuple(None if field == "\\N" else _unescape_tsv(field) for field in line[:-1].split("\t"))
+            for line in f
+        ]
+
+def _unescape_tsv(field: str) -> str:
+    if "\\" not in field:
+        return field
+    return re.sub(r"\\(.)", lambda m: _LOAD_DATA_UNESCAPES[m.group(1)], field)
+
+def _load_data_file(raw, path: str):
+    """
+    Load one spooled TSV batch with LOAD DATA LOCAL INFILE, which the server
+    parses in bulk instead of as INSERT values.
+    """
+    path = path.replace("\\", "/").replace("'", "\\'")
+    _execute_batch(raw, lambda cursor: cursor.execute(
+        f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE identitas "
+        "CHARACTER SET utf8mb4 "
+        "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+        "LINES TERMINATED BY '\\n' "
+        f"({', '.join(_COLUMNS)})"
+    ))